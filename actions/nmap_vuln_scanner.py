@@ -500,9 +500,15 @@ class NmapVulnScanner:
         """Return default ports to scan when none are supplied"""
         default_ports = self.shared_data.config.get("default_vulnerability_ports")
         if isinstance(default_ports, (list, tuple, set)) and default_ports:
-            valid_ports = [str(port) for port in default_ports if str(port).isdigit()]
+            # Parse each entry once; config values are usually ints already
+            valid_ports = set()
+            for port in default_ports:
+                if isinstance(port, int) and not isinstance(port, bool) and port >= 0:
+                    valid_ports.add(port)
+                elif isinstance(port, str) and port.isdigit():
+                    valid_ports.add(int(port))
             if valid_ports:
-                return sorted(set(valid_ports), key=int)
+                return [str(port) for port in sorted(valid_ports)]
         return ["22", "80", "443"]
 
     def parse_vulnerabilities(self, scan_result):
@@ -731,8 +737,8 @@ class NmapVulnScanner:
         """
         try:
             # Get statistics from database
-            all_hosts = self.db.get_all_hosts()
-            hosts_with_vulns = [h for h in all_hosts if h.get('vulnerabilities')]
+            hosts_with_vulns = [h for h in self.db.iter_all_hosts(columns=('vulnerabilities',))
+                                if h.get('vulnerabilities')]
             
             logger.info(f"="*60)
             logger.info(f"VULNERABILITY SCAN SUMMARY")
@@ -11,6 +11,7 @@ import traceback
 import tempfile
 import shutil
 from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import socket
 import subprocess
@@ -25,7 +26,7 @@ except ImportError:
     except ImportError:
         print("Warning: Neither netifaces nor netifaces-plus found. Network discovery may be limited.")
 import time
-import glob
+import heapq
 import logging
 from datetime import datetime
 from rich.console import Console
@@ -72,8 +73,9 @@ class NetworkScanner:
         self.logger = logger
         self.displaying_csv = shared_data.displaying_csv
         self.blacklistcheck = shared_data.blacklistcheck
-        self.mac_scan_blacklist = shared_data.mac_scan_blacklist
-        self.ip_scan_blacklist = shared_data.ip_scan_blacklist
+        # Frozensets give O(1) membership for the per-host blacklist checks
+        self.mac_scan_blacklist = frozenset(shared_data.mac_scan_blacklist)
+        self.ip_scan_blacklist = frozenset(shared_data.ip_scan_blacklist)
         self.console = Console()
         self.lock = threading.Lock()
         self.currentdir = shared_data.currentdir
@@ -106,6 +108,14 @@ class NetworkScanner:
         except ValueError:
             return False
 
+    @staticmethod
+    def _pseudo_mac(ip):
+        """Build the IP-derived pseudo-MAC used by update_netkb, or None for non-IPv4 input."""
+        ip_parts = ip.split('.')
+        if len(ip_parts) != 4:
+            return None
+        return f"00:00:{int(ip_parts[0]):02x}:{int(ip_parts[1]):02x}:{int(ip_parts[2]):02x}:{int(ip_parts[3]):02x}"
+
     def resolve_hostname(self, ip):
         """Resolve hostname for the given IP address."""
         try:
@@ -181,18 +191,19 @@ class NetworkScanner:
         
         # Write ARP scan results to SQLite database
         try:
+            # Collect first, then write in short batches so no transaction spans the loop
+            host_records = []
+            history = []
             for ip, metadata in all_hosts.items():
                 mac = metadata.get('mac', '').lower().strip()
                 vendor = metadata.get('vendor', '')
                 
                 if mac and mac != '00:00:00:00:00:00':
-                    self.db.upsert_host(
-                        mac=mac,
-                        ip=ip,
-                        vendor=vendor
-                    )
-                    self.db.update_ping_status(mac, success=True)
-                    self.db.add_scan_history(mac, ip, 'arp_scan')
+                    host_records.append(dict(mac=mac, ip=ip, vendor=vendor))
+                    history.append((mac, ip, 'arp_scan'))
+            self.db.upsert_hosts_bulk(host_records)
+            self.db.update_ping_success_bulk([record['mac'] for record in host_records])
+            self.db.add_scan_history_bulk(history)
             
             self.logger.debug(f"✅ ARP scan results written to database")
         except Exception as e:
@@ -281,7 +292,7 @@ class NetworkScanner:
                     mac = data.get('mac', '')
                     if not mac or mac == '00:00:00:00:00:00':
                         # Check if this IP already exists in database with a real MAC
-                        existing_mac = next((h['mac'] for h in self.db.get_all_hosts() 
+                        existing_mac = next((h['mac'] for h in self.db.iter_all_hosts(columns=('mac', 'ip'))
                                            if h.get('ip') == host and not h['mac'].startswith('00:00:c0:a8')), None)
                         
                         if existing_mac:
@@ -358,7 +369,7 @@ class NetworkScanner:
                         if not mac or mac == "00:00:00:00:00:00":
                             # MAC/host resolution: SQLITE DB ONLY
                             # Check if this IP already exists in database with a real MAC
-                            existing_hosts = self.db.get_all_hosts()
+                            existing_hosts = self.db.iter_all_hosts(columns=('mac', 'ip'))
                             existing_mac = next((h['mac'] for h in existing_hosts if h.get('ip') == priority_ip and not h['mac'].startswith('00:00:c0:a8')), None)
                             
                             if existing_mac:
@@ -401,7 +412,7 @@ class NetworkScanner:
                         if not mac or mac == "00:00:00:00:00:00":
                             # MAC/host resolution: SQLITE DB ONLY
                             # Check if this IP already exists in database with a real MAC
-                            existing_hosts = self.db.get_all_hosts()
+                            existing_hosts = self.db.iter_all_hosts(columns=('mac', 'ip'))
                             existing_mac = next((h['mac'] for h in existing_hosts if h.get('ip') == ip_str and not h['mac'].startswith('00:00:c0:a8')), None)
                             
                             if existing_mac:
@@ -433,17 +444,17 @@ class NetworkScanner:
             
             # Write ping sweep results to SQLite database
             try:
+                host_records = []
+                history = []
                 for ip, data in ping_discovered.items():
                     mac = data['mac'].lower().strip()
                     vendor = data.get('vendor', '')
                     
-                    self.db.upsert_host(
-                        mac=mac,
-                        ip=ip,
-                        vendor=vendor
-                    )
-                    self.db.update_ping_status(mac, success=True)
-                    self.db.add_scan_history(mac, ip, 'ping_sweep')
+                    host_records.append(dict(mac=mac, ip=ip, vendor=vendor))
+                    history.append((mac, ip, 'ping_sweep'))
+                self.db.upsert_hosts_bulk(host_records)
+                self.db.update_ping_success_bulk([record['mac'] for record in host_records])
+                self.db.add_scan_history_bulk(history)
                 
                 self.logger.debug(f"✅ Ping sweep results written to database")
             except Exception as e:
@@ -524,6 +535,7 @@ class NetworkScanner:
             try:
                 netkb_entries = {}
                 existing_action_columns = []
+                real_mac_by_ip = {}  # First non-pseudo MAC stored per IP, built from the single DB read
 
                 # Read existing data from SQLite database
                 try:
@@ -532,6 +544,8 @@ class NetworkScanner:
                     
                     for host in existing_hosts:
                         mac = host['mac']
+                        if host.get('ip') and not mac.startswith('00:00:c0:a8'):
+                            real_mac_by_ip.setdefault(host['ip'], mac)
                         # Parse IPs (stored as comma-separated in DB, we use ; for compatibility)
                         ips = host['ip'].split(',') if host['ip'] else []
                         hostnames = [host['hostname']] if host['hostname'] else []
@@ -594,8 +608,7 @@ class NetworkScanner:
                     # This allows tracking hosts across routers or when MAC can't be determined
                     if mac == "00:00:00:00:00:00":
                         # Check if this IP already exists in database with a real MAC
-                        existing_mac = next((h['mac'] for h in self.db.get_all_hosts() 
-                                           if h.get('ip') == ip and not h['mac'].startswith('00:00:c0:a8')), None)
+                        existing_mac = real_mac_by_ip.get(ip)
                         
                         if existing_mac:
                             # Use existing real MAC instead of creating pseudo-MAC
@@ -690,6 +703,8 @@ class NetworkScanner:
                 try:
                     self.logger.debug(f"Writing {len(sorted_netkb_entries)} hosts to SQLite database...")
                     
+                    host_records = []
+                    alive_hosts = []
                     for mac, data in sorted_netkb_entries:
                         # Get primary IP (first one if multiple)
                         primary_ip = sorted(data['IPs'], key=self.ip_key)[0] if data['IPs'] else ''
@@ -701,8 +716,8 @@ class NetworkScanner:
                         valid_ports = [p for p in data['Ports'] if p]
                         ports_str = ','.join(sorted(valid_ports, key=int)) if valid_ports else ''
                         
-                        # Upsert host to database
-                        self.db.upsert_host(
+                        # Queue host for the bulk upsert below
+                        host_records.append(dict(
                             mac=mac,
                             ip=primary_ip,
                             hostname=hostname,
@@ -726,11 +741,11 @@ class NetworkScanner:
                             notes=data.get('Notes', ''),
                             failed_ping_count=data.get('Failed_Pings', 0),
                             status='alive' if data.get('Alive') == '1' else 'degraded'
-                        )
+                        ))
                         
                         # Update ping status based on alive state
                         if data.get('Alive') == '1':
-                            self.db.update_ping_status(mac, success=True)
+                            alive_hosts.append(mac)
                         elif data.get('Failed_Pings', 0) > 0:
                             # Don't call update_ping_status for failed pings here
                             # because we already have the correct failed_ping_count
@@ -738,6 +753,10 @@ class NetworkScanner:
                             if data.get('Failed_Pings', 0) >= 30:
                                 self.logger.debug(f"Host {mac} in degraded state ({data.get('Failed_Pings', 0)} failed pings)")
                     
+                    # Rows are already collected: write them in two short batches
+                    self.db.upsert_hosts_bulk(host_records)
+                    self.db.update_ping_success_bulk(alive_hosts)
+                    
                     self.logger.info(f"✅ Updated SQLite database with {len(sorted_netkb_entries)} hosts")
                     
                 except Exception as db_error:
@@ -1155,6 +1174,9 @@ class NetworkScanner:
         """
         Helper class to update the live status of hosts and clean up scan results.
         """
+        # Only these netkb columns feed the live status counters
+        LIVESTATUS_COLUMNS = ['MAC Address', 'Ports', 'Alive']
+
         def __init__(self, source_csv_path, output_csv_path):
             self.logger = logger
             self.source_csv_path = source_csv_path
@@ -1173,37 +1195,44 @@ class NetworkScanner:
                 if not os.path.exists(self.source_csv_path):
                     self.logger.warning(f"Source CSV file does not exist: {self.source_csv_path}")
                     # Create an empty DataFrame with expected columns
-                    self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                    self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
                     return
                 
                 # Check if file is empty
                 if os.path.getsize(self.source_csv_path) == 0:
                     self.logger.warning(f"Source CSV file is empty: {self.source_csv_path}")
-                    self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                    self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
                     return
                 
                 # Try to read the CSV, catching specific pandas errors
                 try:
-                    self.df = pd.read_csv(self.source_csv_path)
+                    # Project to the needed columns and read them as plain strings so
+                    # pandas skips tokenizing unused columns and dtype inference
+                    self.df = pd.read_csv(
+                        self.source_csv_path,
+                        usecols=lambda col: col in self.LIVESTATUS_COLUMNS,
+                        dtype=str,
+                        engine='c',
+                        na_filter=False,
+                    )
                 except pd.errors.EmptyDataError:
                     self.logger.warning(f"Source CSV file has no data to parse: {self.source_csv_path}")
-                    self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                    self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
                     return
                 except Exception as read_error:
                     # Catch any other CSV reading errors (e.g., "No columns to parse from file")
                     self.logger.warning(f"Could not parse CSV file: {read_error}")
-                    self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                    self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
                     return
                 
                 # Check if DataFrame is empty or missing required columns
                 if self.df.empty:
                     self.logger.warning(f"Source CSV file has no data: {self.source_csv_path}")
-                    self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                    self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
                     return
                 
                 # Ensure required columns exist
-                required_columns = ['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive']
-                missing_columns = [col for col in required_columns if col not in self.df.columns]
+                missing_columns = [col for col in self.LIVESTATUS_COLUMNS if col not in self.df.columns]
                 if missing_columns:
                     self.logger.warning(f"Missing columns in CSV: {missing_columns}")
                     for col in missing_columns:
@@ -1214,7 +1243,7 @@ class NetworkScanner:
             except Exception as e:
                 self.logger.error(f"Error in read_csv: {e}")
                 # Create empty DataFrame on error
-                self.df = pd.DataFrame(columns=['MAC Address', 'IPs', 'Hostnames', 'Ports', 'Alive'])
+                self.df = pd.DataFrame(columns=self.LIVESTATUS_COLUMNS)
 
         def calculate_open_ports(self):
             """
@@ -1229,21 +1258,16 @@ class NetworkScanner:
                     self.logger.warning("DataFrame is empty or missing required columns for port calculation")
                     return
 
-                alive_mask = self.df['Alive'].astype(str).str.strip() == '1'
-                alive_df = self.df[alive_mask].copy()
-                
-                if alive_df.empty:
+                alive_mask = (self.df['Alive'].astype(str).str.strip() == '1').to_numpy()
+                if not alive_mask.any():
                     self.logger.debug("No alive hosts found for port calculation")
                     return
-                
-                # Convert Ports column to string type to avoid pandas dtype warning
-                alive_df = alive_df.copy()
-                alive_df['Ports'] = alive_df['Ports'].fillna('').astype(str)
-                # Count non-empty port entries (split by ';' and filter out empty strings)
-                alive_df['Port Count'] = alive_df['Ports'].apply(
-                    lambda x: len([p for p in x.split(';') if p.strip()]) if x else 0
-                )
-                self.total_open_ports = int(alive_df['Port Count'].sum())
+
+                # Count non-empty ';'-separated port entries in one vectorized pass
+                # and reduce the per-host counts with a single NumPy sum
+                ports = self.df['Ports'].fillna('').astype(str)[alive_mask]
+                port_counts = ports.str.count(r'[^;\s][^;]*').to_numpy(dtype=np.int64)
+                self.total_open_ports = int(port_counts.sum())
                 
                 self.logger.debug(f"Calculated total open ports: {self.total_open_ports}")
                 
@@ -1266,11 +1290,11 @@ class NetworkScanner:
                     return
                 
                 # Count all hosts (excluding STANDALONE entries)
-                self.all_known_hosts_count = self.df[self.df['MAC Address'] != 'STANDALONE'].shape[0]
+                self.all_known_hosts_count = int(np.count_nonzero(self.df['MAC Address'].to_numpy() != 'STANDALONE'))
                 
                 # Count alive hosts
                 alive_mask = self.df['Alive'].astype(str).str.strip() == '1'
-                self.alive_hosts_count = self.df[alive_mask].shape[0]
+                self.alive_hosts_count = int(np.count_nonzero(alive_mask.to_numpy()))
                 
                 self.logger.debug(f"Host counts - Total: {self.all_known_hosts_count}, Alive: {self.alive_hosts_count}")
                 
@@ -1322,10 +1346,16 @@ class NetworkScanner:
             Cleans up old scan result files, keeping only the most recent ones.
             """
             try:
-                files = glob.glob(scan_results_dir + '/*')
-                files.sort(key=os.path.getmtime)
-                for file in files[:-20]:
-                    os.remove(file)
+                # One scandir pass yields (mtime, path) pairs without a separate stat per sort key
+                with os.scandir(scan_results_dir) as it:
+                    entries = [(entry.stat().st_mtime, entry.path) for entry in it
+                               if not entry.name.startswith('.') and entry.is_file()]
+                if len(entries) > 20:
+                    keep = {path for _, path in heapq.nlargest(20, entries)}
+                    doomed = [path for _, path in entries if path not in keep]
+                    # Overlap the unlink syscalls; results are consumed to surface errors
+                    with ThreadPoolExecutor(max_workers=min(8, len(doomed))) as executor:
+                        list(executor.map(os.remove, doomed))
                 self.logger.info("Scan results cleaned up")
             except Exception as e:
                 self.logger.error(f"Error in clean_scan_results: {e}")
@@ -1347,18 +1377,12 @@ class NetworkScanner:
             ip_data, open_ports, all_ports, csv_result_file, netkbfile, alive_ips = scanner.start()
 
             # Convert alive MACs to use pseudo-MACs for hosts without real MAC addresses
-            alive_macs = set()
-            for i, mac in enumerate(ip_data.mac_list):
-                if mac == "00:00:00:00:00:00" and i < len(ip_data.ip_list):
-                    # Convert to pseudo-MAC using the same logic as update_netkb
-                    ip = ip_data.ip_list[i]
-                    ip_parts = ip.split('.')
-                    if len(ip_parts) == 4:
-                        pseudo_mac = f"00:00:{int(ip_parts[0]):02x}:{int(ip_parts[1]):02x}:{int(ip_parts[2]):02x}:{int(ip_parts[3]):02x}"
-                        alive_macs.add(pseudo_mac)
-                        self.logger.debug(f"Added pseudo-MAC {pseudo_mac} to alive_macs for IP {ip}")
-                else:
-                    alive_macs.add(mac)
+            real_macs = {mac for mac in ip_data.mac_list if mac != "00:00:00:00:00:00"}
+            pseudo_macs = {self._pseudo_mac(ip) for ip, mac in zip(ip_data.ip_list, ip_data.mac_list)
+                           if mac == "00:00:00:00:00:00"}
+            pseudo_macs.discard(None)
+            alive_macs = real_macs | pseudo_macs
+            self.logger.debug(f"Added {len(pseudo_macs)} pseudo-MACs to alive_macs")
 
             table = Table(title="Scan Results", show_lines=True)
             table.add_column("IP", style="cyan", no_wrap=True)
@@ -1368,9 +1392,13 @@ class NetworkScanner:
             for port in all_ports:
                 table.add_column(f"{port}", style="green")
 
+            blacklistcheck = self.blacklistcheck
+            mac_bl = self.mac_scan_blacklist
+            ip_bl = self.ip_scan_blacklist
+
             netkb_data = []
             for ip, ports, hostname, mac in zip(ip_data.ip_list, open_ports.values(), ip_data.hostname_list, ip_data.mac_list):
-                if self.blacklistcheck and (mac in self.mac_scan_blacklist or ip in self.ip_scan_blacklist):
+                if blacklistcheck and (mac in mac_bl or ip in ip_bl):
                     continue
                 alive = '1' if mac in alive_macs else '0'
                 row = [ip, hostname, alive, mac] + [Text(str(port), style="green bold") if port in ports else Text("", style="on red") for port in all_ports]
@@ -1382,7 +1410,7 @@ class NetworkScanner:
                     writer = csv.writer(file)
                     writer.writerow(["IP", "Hostname", "Alive", "MAC Address"] + [str(port) for port in all_ports])
                     for ip, ports, hostname, mac in zip(ip_data.ip_list, open_ports.values(), ip_data.hostname_list, ip_data.mac_list):
-                        if self.blacklistcheck and (mac in self.mac_scan_blacklist or ip in self.ip_scan_blacklist):
+                        if blacklistcheck and (mac in mac_bl or ip in ip_bl):
                             continue
                         alive = '1' if mac in alive_macs else '0'
                         writer.writerow([ip, hostname, alive, mac] + [str(port) if port in ports else '' for port in all_ports])
@@ -1681,7 +1709,11 @@ class NetworkScanner:
                     self.logger.warning(f"IP {ip} not found in database - creating new entry")
                     # Create new entry with pseudo-MAC if no existing record
                     pseudo_mac = f"00:00:{':'.join(f'{int(octet):02x}' for octet in ip.split('.'))}"
-                    sorted_ports = sorted([str(p) for p in open_ports], key=lambda x: int(x) if x.isdigit() else 0)
+                    if all(isinstance(p, int) for p in open_ports):
+                        # nmap reports ports as ints - sort them directly without re-parsing strings
+                        sorted_ports = [str(p) for p in sorted(open_ports)]
+                    else:
+                        sorted_ports = sorted([str(p) for p in open_ports], key=lambda x: int(x) if x.isdigit() else 0)
                     
                     self.db.upsert_host(
                         mac=pseudo_mac,
@@ -9,10 +9,33 @@ import os
 import json
 import time
 import logging
+import functools
+import hashlib
+import heapq
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-
-from openai import OpenAI
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+try:
+    import tiktoken  # optional, exact prompt token counts
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+try:
+    import orjson  # optional, faster serialization for cache keys and prompts
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 from logger import Logger
 from env_manager import EnvManager, load_env
@@ -20,6 +43,376 @@ from env_manager import EnvManager, load_env
 # Load environment variables immediately
 load_env()
 
+# Dashboard refreshes are tens of seconds apart; httpx's default 5s keep-alive
+# would drop the TLS connection between them and pay a fresh handshake each time
+_HTTP_LIMITS = dict(max_connections=16, max_keepalive_connections=8, keepalive_expiry=120.0)
+
+# Expired entries dropped from the in-memory cache per insert
+_CACHE_SWEEP_PER_INSERT = 8
+
+# Finding fields worth sending to the model; bookkeeping (ids, timestamps,
+# confirmation counters, network ids) is dropped
+_FINDING_FIELDS = (
+    "host", "port", "service", "protocol", "vulnerability", "severity",
+    "username", "password", "details",
+)
+# Longer strings (mostly script output in `details`, at any nesting depth) are clipped in prompts
+_FINDING_FIELD_MAX_CHARS = 120
+
+# System prompts are fixed, so they are built once at import time
+_SYSTEM_NETWORK_SUMMARY = (
+    "You are Ragnar, a witty cybersecurity Viking AI. "
+    "Provide concise, aggressive but clear summaries."
+)
+_SYSTEM_VULNERABILITY = (
+    "You are Ragnar, an elite vulnerability hunter. "
+    "Structure your analysis clearly with sections and bullet points. "
+    "Use markdown-style formatting for readability."
+)
+_SYSTEM_WEAKNESS = (
+    "You are Ragnar, a penetration strategist. "
+    "Structure attack vector analysis clearly with numbered attack paths. "
+    "Use markdown formatting for readability."
+)
+_SYSTEM_COMBINED = (
+    "You are Ragnar, a witty cybersecurity Viking AI, elite vulnerability hunter "
+    "and penetration strategist. You answer several tasks at once and reply with "
+    "a single JSON object whose values are markdown-formatted strings."
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _system_message(content: str) -> Dict[str, str]:
+    """Shared, never-mutated system message dict for each distinct system prompt."""
+    return {"role": "system", "content": content}
+
+
+def _compact_json(data: Any) -> str:
+    """Serialize prompt payloads without indentation; whitespace costs tokens."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _canonical_bytes(data: Any) -> bytes:
+    """Deterministic (key-sorted) compact JSON bytes for hashing."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    # Raw UTF-8 like orjson, so persisted cache keys don't depend on whether orjson is installed
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+# Network counters shown in the summary prompt, as (network_data key, label)
+_SUMMARY_COUNTERS = (
+    ("target_count", "Targets"),
+    ("port_count", "Open Ports"),
+    ("vulnerability_count", "Vulnerabilities Found"),
+    ("credential_count", "Credentials Found"),
+)
+
+# Fixed instructions that follow the findings in the analysis prompts
+_VULNERABILITY_INSTRUCTIONS = """Provide a structured analysis:
+
+First, give a brief Viking-style tactical summary (max 50 words) of the overall vulnerability situation.
+
+Then provide detailed analysis:
+
+**Critical Weaknesses:**
+- List the most severe vulnerabilities (CVE numbers if available)
+- Include affected hosts/ports
+- Note severity ratings
+
+**Immediate Actions Required:**
+- Prioritized remediation steps
+- What to patch/fix first
+- Quick wins for risk reduction
+
+**Overall Risk Assessment:**
+- Current attack surface severity (Critical/High/Medium)
+- Potential impact if exploited
+- Recommended timeline for fixes
+
+Tone: Direct, tactical Viking strategist. Use bullet points and clear sections.
+"""
+
+_WEAKNESS_INSTRUCTIONS = """Provide structured attack vector analysis:
+
+First, give a brief, witty Viking-style summary (max 50 words) describing the network's exploitability and main attack surface.
+
+Then provide detailed attack paths:
+
+**Primary Attack Paths:**
+
+1. **[Attack Name]**
+   - Target: [specific host/service]
+   - Method: [exploitation technique]
+   - Risk Level: [Critical/High/Medium]
+   - Ease of Exploitation: [Easy/Moderate/Difficult]
+
+2. **[Attack Name]**
+   - Target: [specific host/service]
+   - Method: [exploitation technique]
+   - Risk Level: [Critical/High/Medium]
+   - Ease of Exploitation: [Easy/Moderate/Difficult]
+
+3. **[Attack Name]** (if applicable)
+   - Target: [specific host/service]
+   - Method: [exploitation technique]
+   - Risk Level: [Critical/High/Medium]
+   - Ease of Exploitation: [Easy/Moderate/Difficult]
+
+**Defense Recommendations:**
+- Immediate hardening steps
+- Network segmentation suggestions
+
+Limit to 2-3 most viable attack paths. Be specific and tactical.
+"""
+
+# Headroom for the short per-request headers (counts, network profile) that
+# surround the findings; they are not counted precisely
+_PROMPT_HEADER_TOKENS = 40
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoder():
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Prompt tokens in text; estimated at ~4 characters per token without tiktoken."""
+    encoder = _token_encoder()
+    if encoder is not None:
+        # encode_ordinary skips the special-token scan, which is slower and
+        # raises if scan output happens to contain a literal "<|endoftext|>"
+        return len(encoder.encode_ordinary(text))
+    return len(text) // 4 + 1
+
+
+@functools.lru_cache(maxsize=8)
+def _fixed_tokens(text: str) -> int:
+    """_count_tokens() for the constant prompt parts, counted once."""
+    return _count_tokens(text)
+
+
+def _fit_to_budget(findings: List[Dict], budget: int) -> List[Dict]:
+    """Greedily keep findings (in priority order) until their JSON reaches the token budget."""
+    kept = []
+    used = 1  # enclosing brackets
+    for finding in findings:
+        cost = _count_tokens(_compact_json(finding)) + 1
+        if kept and used + cost > budget:
+            break
+        kept.append(finding)
+        used += cost
+    return kept
+
+
+_SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "unknown": 4}
+
+
+def _response_body_text(body: Dict) -> str:
+    """Concatenate the output_text parts of a raw Responses API body (Batch API output)."""
+    parts = []
+    for item in body.get("output") or ():
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content") or ():
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts).strip()
+
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a ```json ... ``` wrapper some models put around JSON replies."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _severity_rank(finding: Dict) -> int:
+    return _SEVERITY_RANK.get(str(finding.get("severity") or "unknown").lower(), 4)
+
+
+def _top_findings(findings: List[Dict], limit: int) -> List[Dict]:
+    """The `limit` most severe findings, keeping input order among equal severities."""
+    return heapq.nsmallest(limit, findings, key=_severity_rank)
+
+
+def _finding_sort_key(finding: Dict):
+    return (str(finding.get("host", "")), str(finding.get("vulnerability", "")), str(finding.get("service", "")))
+
+
+def _prompt_order_key(finding: Dict):
+    """Most severe first, then a stable order, so the same set always serializes identically."""
+    return (_severity_rank(finding),) + _finding_sort_key(finding)
+
+
+def _finding_identity(finding: Dict):
+    return (finding.get("host"), finding.get("port"), finding.get("service"),
+            finding.get("vulnerability"), finding.get("username"))
+
+
+def _clip(value: Any) -> Any:
+    """Clip long strings, including those nested in dicts/lists (e.g. details.raw_output)."""
+    if isinstance(value, str):
+        if len(value) > _FINDING_FIELD_MAX_CHARS:
+            return value[:_FINDING_FIELD_MAX_CHARS - 1] + "…"
+        return value
+    if isinstance(value, dict):
+        return {k: _clip(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clip(v) for v in value]
+    return value
+
+
+def _unique_findings(findings: List[Dict]) -> Iterator[Dict]:
+    """Skip repeat reports of the same finding so they don't take up prompt slots."""
+    seen = set()
+    for finding in findings:
+        ident = _finding_identity(finding)
+        if ident not in seen:
+            seen.add(ident)
+            yield finding
+
+
+def _summarize_findings(findings: List[Dict], limit: int) -> List[Dict]:
+    """Project the first `limit` findings onto the prompt-relevant fields, clipping long strings."""
+    return [
+        {field: _clip(finding[field]) for field in _FINDING_FIELDS if finding.get(field) not in (None, "", {}, [])}
+        for finding in islice(findings, limit)
+    ]
+
+
+# One OpenAI client (and HTTP connection pool) per API token for the whole
+# process, shared by every AIService instance and reused across token reloads
+_CLIENT_CACHE: Dict[tuple, Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _shared_client(api_token: str, max_retries: int):
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get((api_token, max_retries))
+        if client is None:
+            # Imported here so installs that never enable AI don't pay for loading the SDK
+            import httpx
+            from openai import OpenAI, DefaultHttpxClient
+
+            client = OpenAI(
+                api_key=api_token,
+                max_retries=max_retries,
+                http_client=DefaultHttpxClient(http2=HAS_HTTP2, limits=httpx.Limits(**_HTTP_LIMITS)),
+            )
+            _CLIENT_CACHE[(api_token, max_retries)] = client
+        return client
+
+
+def _evict_clients(api_token: str) -> List[Any]:
+    """Remove and return the cached clients for a token that is no longer in use."""
+    with _CLIENT_CACHE_LOCK:
+        keys = [key for key in _CLIENT_CACHE if key[0] == api_token]
+        return [_CLIENT_CACHE.pop(key) for key in keys]
+
+
+class _CacheEntry:
+    """In-memory cache record; slotted to keep per-entry overhead small."""
+
+    __slots__ = ("value", "timestamp")
+
+    def __init__(self, value: Any, timestamp: float):
+        self.value = value
+        self.timestamp = timestamp
+
+
+class _RateLimiter:
+    """Blocking token bucket: at most `per_minute` acquisitions per rolling minute, with bursts."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, int(per_minute))
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class _CallStats:
+    """Per-analysis counters: calls, errors, cache hits/misses and latency."""
+
+    __slots__ = ("calls", "errors", "hits", "misses", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = self.errors = self.hits = self.misses = 0
+        self.total_seconds = self.max_seconds = 0.0
+
+    def observe(self, seconds: float, error: bool = False, hit: Optional[bool] = None):
+        self.calls += 1
+        self.errors += error
+        if hit is not None:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "avg_seconds": round(self.total_seconds / self.calls, 4) if self.calls else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+def _guard(name: str):
+    """Log-and-return-None on failure, recording latency and cache outcome under `name`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            self._call_state.cache_hit = None
+            start = time.perf_counter()
+            error = False
+            try:
+                return fn(self, *args, **kwargs)
+            except Exception as e:
+                error = True
+                self.logger.error(f"{name} failed: {e}")
+                return None
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._metrics_lock:
+                    self._metrics[name].observe(elapsed, error, self._call_state.cache_hit)
+        return wrapper
+    return deco
+
 
 # ===================================================================
 #   AI SERVICE
@@ -35,9 +428,17 @@ class AIService:
 
         cfg = shared_data.config
 
+        # is_enabled() fast path; kept in sync by the enabled/client setters
+        self._client = None
+        self._ready = False
+
         # Configuration
         self.enabled = cfg.get("ai_enabled", False)
         self.model = cfg.get("ai_model", "gpt-5.1")
+        # Routing: the summary/vulnerability rewrites go to a cheaper model, the
+        # attack-path reasoning (and the combined request that includes it) to the main one
+        self.model_simple = cfg.get("ai_model_simple", "gpt-5-nano")
+        self.model_reasoning = cfg.get("ai_model_reasoning", self.model)
 
         # These must remain for backward compatibility (but not used)
         self.max_tokens = cfg.get("ai_max_tokens")
@@ -45,18 +446,68 @@ class AIService:
         self.temperature_supported = True  # will disable on first failure
 
         self.vulnerability_summaries = cfg.get("ai_vulnerability_summaries", True)
+        # Prompt tokens spent on the findings list in each analysis
+        self.findings_token_budget = cfg.get("ai_findings_token_budget", 1500)
+        # Ceiling on the whole request (system + instructions + findings)
+        self.input_budget = cfg.get("ai_input_budget", 2000)
         self.network_insights = cfg.get("ai_network_insights", True)
 
         self.api_token = self.env_manager.get_token()
 
-        # Cache
-        self.cache = {}
+        # Throttling: cap parallel requests and requests per minute so bursts
+        # queue locally instead of hitting 429s; the SDK retries 429/5xx with backoff
+        concurrency = cfg.get("ai_max_concurrency", cfg.get("ai_concurrency", 4))
+        self._request_slots = threading.BoundedSemaphore(concurrency)
+        self._rate_limiter = _RateLimiter(cfg.get("ai_rpm", 60))
+        self.max_retries = cfg.get("ai_max_retries", 4)
+        # Long-lived worker pool for fan-out, so each refresh doesn't spawn threads;
+        # built on first use and released by close()
+        self._executor_workers = max(3, concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        # Cache (LRU-ordered, bounded; oldest entries are evicted first)
+        self.cache = OrderedDict()
         self.cache_ttl = 3600  # 1 hour (3600 seconds) - reduce token consumption
-
-        # Client initialization
+        # Keys are derived from the prompt content and model, so an identical
+        # network state can safely reuse a stored answer for much longer
+        self.persistent_cache_ttl = cfg.get("ai_persistent_cache_ttl", 7 * 86400)
+        self.cache_max_entries = cfg.get("ai_cache_max_entries", cfg.get("ai_cache_max", 256))
+        self._cache_lock = threading.Lock()
+        # In-flight requests by cache key, so concurrent identical prompts coalesce
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self._inflight_timeout = 60
+
+        # Batch API mode: insights are queued at half price and served from
+        # cache once the batch completes (can take up to 24h)
+        self.batch_mode = cfg.get("ai_batch_mode", False)
+        self.pending_batches: Dict[str, List[str]] = {}
+        self._pending_keys = set()
+        self._batch_lock = threading.Lock()
+
+        # Last generate_insights() result and the scan state it was built from
+        self._last_insights = None  # (state, timestamp, output)
+
+        # Per-analysis metrics recorded by @_guard; see get_metrics()
+        self._metrics = defaultdict(_CallStats)
+        self._metrics_lock = threading.Lock()
+        self._input_tokens = 0
+        self._cached_input_tokens = 0
+        self._call_state = threading.local()
+
+        # SQLite backing store so cached analyses survive restarts
+        self.db = getattr(shared_data, "db", None)
+        if self.db:
+            # Batches submitted before a restart are still collected by poll_batches()
+            self.pending_batches.update(self.db.get_ai_pending_batches())
+            for keys in self.pending_batches.values():
+                self._pending_keys.update(keys)
+
+        # Client is created on first use (see ensure_ready), off the startup path
         self.client = None
         self.initialization_error = None
-        self._initialize_client()
+        self._client_lock = threading.Lock()
 
 
 
@@ -64,6 +515,26 @@ class AIService:
     #   INITIALIZATION
     # ===================================================================
 
+    # enabled/client are also assigned from the web UI, so both are properties
+    # that refresh the precomputed readiness flag whenever they change
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = value
+        self._ready = bool(value and self._client is not None)
+
+    @property
+    def client(self):
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._ready = bool(self._enabled and value is not None)
+
     def _initialize_client(self):
         if not self.enabled:
             return
@@ -74,15 +545,42 @@ class AIService:
             return
 
         try:
-            self.client = OpenAI(api_key=self.api_token)
+            self.client = _shared_client(self.api_token, self.max_retries)
             self.initialization_error = None
-            self.logger.info(f"AI Service initialized using model: {self.model}")
+            self.logger.info(
+                f"AI Service initialized using models: {self.model_reasoning} (reasoning), {self.model_simple} (summaries)"
+            )
         except Exception as exc:
             self.client = None
             self.initialization_error = f"OpenAI client initialization failed: {exc}"
             self.logger.error(self.initialization_error)
 
 
+    def _close_client(self, api_token: Optional[str]):
+        """Drop the current client; close the shared one too if `api_token` is being retired."""
+        self.client = None
+        if not api_token:
+            return
+        for client in _evict_clients(api_token):
+            try:
+                client.close()
+            except Exception as exc:
+                self.logger.debug(f"Error closing previous OpenAI client: {exc}")
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._executor_workers, thread_name_prefix="ai")
+            return self._executor
+
+    def close(self):
+        """Release the worker pool and client; both are rebuilt if the service is used again."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self._close_client(None)
+
     def reload_token(self) -> bool:
         """Refresh the API token from disk and reinitialize the OpenAI client."""
 
@@ -90,8 +588,9 @@ class AIService:
         if hasattr(self.shared_data, "config"):
             self.enabled = self.shared_data.config.get("ai_enabled", self.enabled)
 
-        self.api_token = self.env_manager.get_token()
-        self.client = None
+        previous_token, self.api_token = self.api_token, self.env_manager.get_token()
+        # An unchanged token keeps its pooled client; a replaced one is closed
+        self._close_client(previous_token if previous_token != self.api_token else None)
         self.initialization_error = None
 
         if not self.enabled:
@@ -126,6 +625,8 @@ class AIService:
 
     def is_enabled(self):
         """Return True when the service is enabled and the client is ready."""
+        if self._ready:
+            return True
         return self.ensure_ready()
 
     def ensure_ready(self):
@@ -141,6 +642,14 @@ class AIService:
         if self.client is not None and self.initialization_error is None:
             return True
 
+        with self._client_lock:
+            return self._initialize_client_locked()
+
+    def _initialize_client_locked(self):
+        # Another thread may have finished initializing while we waited
+        if self.client is not None and self.initialization_error is None:
+            return True
+
         # Don't keep retrying when we've already recorded a permanent failure
         # But allow retry if token was added after initial failure
         if self.initialization_error and self.api_token:
@@ -159,22 +668,93 @@ class AIService:
         self._initialize_client()
         return self.client is not None and self.initialization_error is None
 
-    def _cache_key(self, name: str, content: Any):
-        import hashlib
-        raw = f"{name}:{json.dumps(content, sort_keys=True)}"
-        return hashlib.md5(raw.encode()).hexdigest()
+    def _cache_key(self, name: str, content: Any, model: Optional[str] = None):
+        # Versioned prefix so keys from the old md5 scheme can never collide
+        h = hashlib.blake2b(b"v2\x1f", digest_size=16)
+        # Model is part of the key so switching models never serves stale answers
+        h.update((model or self.model).encode())
+        h.update(b"\x1f")
+        h.update(name.encode())
+        h.update(b"\x1f")
+        # Prompt text that is already canonical is hashed as-is, skipping a second serialization
+        h.update(content.encode() if isinstance(content, str) else _canonical_bytes(content))
+        return h.hexdigest()
+
+    def _claim_inflight(self, key: str):
+        """
+        Register interest in computing `key`.
+        Returns (True, event) for the caller that should do the work, or
+        (False, event) for a caller that should wait on the leader's event.
+        """
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            if event is not None:
+                return False, event
+            event = self._inflight[key] = threading.Event()
+            return True, event
+
+    def _release_inflight(self, key: str, event: threading.Event):
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+        event.set()
+
+    def _cached_ask(self, key: str, system: str, user: str,
+                    model: Optional[str] = None) -> Optional[str]:
+        """Cache-first _ask(); identical concurrent prompts share one upstream call."""
+        cached = self._cache_get(key)
+        self._call_state.cache_hit = bool(cached)
+        if cached:
+            return cached
+
+        leader, event = self._claim_inflight(key)
+        if not leader:
+            event.wait(self._inflight_timeout)
+            return self._cache_get(key)
+
+        try:
+            resp = self._ask(system, user, model=model)
+            if resp:
+                self._cache_set(key, resp)
+            return resp
+        finally:
+            self._release_inflight(key, event)
 
     def _cache_get(self, key: str):
-        item = self.cache.get(key)
-        if not item:
+        with self._cache_lock:
+            item = self.cache.get(key)
+            if item:
+                if time.time() - item.timestamp <= self.cache_ttl:
+                    self.cache.move_to_end(key)
+                    return item.value
+                del self.cache[key]
+
+        if self.db is None:
             return None
-        if time.time() - item["timestamp"] > self.cache_ttl:
-            del self.cache[key]
-            return None
-        return item["value"]
 
-    def _cache_set(self, key: str, value: Any):
-        self.cache[key] = {"timestamp": time.time(), "value": value}
+        # Memory miss: fall back to the persistent cache and promote the hit
+        value = self.db.get_ai_cache(key, self.persistent_cache_ttl)
+        if value:
+            self._cache_set(key, value, persist=False)
+        return value
+
+    def _cache_set(self, key: str, value: Any, persist: bool = True):
+        if persist and self.db is not None and isinstance(value, str):
+            self.db.set_ai_cache(key, value)
+
+        now = time.time()
+        with self._cache_lock:
+            self.cache[key] = _CacheEntry(value, now)
+            self.cache.move_to_end(key)
+
+            # Drop a few expired entries from the cold end (amortized across
+            # inserts so one call never walks the whole cache), then enforce the size cap
+            for _ in range(_CACHE_SWEEP_PER_INSERT):
+                oldest = next(iter(self.cache.values()))
+                if now - oldest.timestamp <= self.cache_ttl:
+                    break
+                self.cache.popitem(last=False)
+            while len(self.cache) > self.cache_max_entries:
+                self.cache.popitem(last=False)
 
 
 
@@ -182,9 +762,11 @@ class AIService:
     #   CORE GPT-5 CALL — NEW RESPONSES API
     # ===================================================================
 
-    def _ask(self, system_msg: str, user_msg: str) -> Optional[str]:
+    def _ask(self, system_msg: str, user_msg: str, json_output: bool = False,
+             model: Optional[str] = None) -> Optional[str]:
         """
         Unified GPT-5 call with temperature fallback (required for tests).
+        json_output asks the model for a single JSON object instead of free text.
         """
 
         if not self.is_enabled():
@@ -194,24 +776,11 @@ class AIService:
             self.logger.error("AI client unavailable despite service being enabled.")
             return None
 
-        # Base GPT-5 payload
-        payload = {
-            "model": self.model,
-            "input": [
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-            "reasoning": {"effort": "low"},
-            "text": {"verbosity": "low"},
-        }
-
-        # Include temperature ONLY if still marked supported
-        if self.temperature_supported and self.temperature is not None:
-            payload["temperature"] = self.temperature
+        payload = self._build_payload(system_msg, user_msg, json_output, model)
 
         # FIRST ATTEMPT
         try:
-            result = self.client.responses.create(**payload)
+            result = self._create_response(**payload)
             return self._extract_output(result)
 
         except Exception as e:
@@ -228,7 +797,7 @@ class AIService:
 
                 # SECOND ATTEMPT WITHOUT TEMPERATURE
                 try:
-                    result = self.client.responses.create(**payload)
+                    result = self._create_response(**payload)
                     return self._extract_output(result)
                 except Exception as e2:
                     self.logger.error(f"Retry after removing temperature failed: {e2}")
@@ -237,14 +806,48 @@ class AIService:
             self.logger.error(f"OpenAI call failed: {e}")
             return None
 
+    def _create_response(self, **payload):
+        """responses.create() behind the local rate limiter and concurrency cap."""
+        self._rate_limiter.acquire()
+        with self._request_slots:
+            return self.client.responses.create(**payload)
+
+    def _build_payload(self, system_msg: str, user_msg: str, json_output: bool = False,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        """Responses API request body, shared by live calls and Batch API lines."""
+        # Base GPT-5 payload
+        payload = {
+            "model": model or self.model,
+            "input": [
+                _system_message(system_msg),
+                {"role": "user", "content": user_msg},
+            ],
+            "reasoning": {"effort": "low"},
+            "text": {"verbosity": "low"},
+        }
+        if json_output:
+            payload["text"]["format"] = {"type": "json_object"}
+
+        # Include temperature ONLY if still marked supported
+        if self.temperature_supported and self.temperature is not None:
+            payload["temperature"] = self.temperature
+        return payload
+
 
 
     def _extract_output(self, result):
         """Extract output text and log token usage."""
-        if hasattr(result, "usage"):
+        if getattr(result, "usage", None) is not None:
             u = result.usage
+            details = getattr(u, "input_tokens_details", None)
+            cached = getattr(details, "cached_tokens", 0) or 0
+            with self._metrics_lock:
+                self._input_tokens += u.input_tokens
+                self._cached_input_tokens += cached
+                ratio = self._cached_input_tokens / self._input_tokens if self._input_tokens else 0.0
             self.logger.info(
-                f"AI Tokens → input:{u.input_tokens} output:{u.output_tokens} total:{u.total_tokens}"
+                f"AI Tokens → input:{u.input_tokens} (cached:{cached}) output:{u.output_tokens} "
+                f"total:{u.total_tokens} | prompt cache hit ratio {ratio:.0%}"
             )
 
         try:
@@ -255,35 +858,36 @@ class AIService:
     #   NETWORK SUMMARY
     # ===================================================================
 
-    def analyze_network_summary(self, network_data):
-        if not self.is_enabled() or not self.network_insights:
-            return None
+    def _network_summary_request(self, network_data, model: Optional[str] = None):
+        """Return (cache_key, system, user, model) for the network summary prompt."""
+        model = model or self.model_simple
+        # Only the counters reach the prompt, so extra or volatile fields in
+        # network_data must not split the cache
+        counters = [network_data.get(field) for field, _label in _SUMMARY_COUNTERS]
+        key = self._cache_key("summary", counters, model)
 
-        key = self._cache_key("summary", network_data)
-        cached = self._cache_get(key)
-        if cached:
-            return cached
+        system = _SYSTEM_NETWORK_SUMMARY
 
-        system = (
-            "You are Ragnar, a witty cybersecurity Viking AI. "
-            "Provide concise, aggressive but clear summaries."
+        # Unknown counters are left out rather than spelled out as "None"
+        stats = "\n".join(
+            f"{label}: {value}" for (_field, label), value in zip(_SUMMARY_COUNTERS, counters)
+            if value not in (None, "")
         )
-
         user = f"""
 Analyze this network scan:
 
-Targets: {network_data.get('target_count')}
-Open Ports: {network_data.get('port_count')}
-Vulnerabilities Found: {network_data.get('vulnerability_count')}
-Credentials Found: {network_data.get('credential_count')}
+{stats}
 
 Give a 2–3 sentence Viking-style summary.
 """
+        return key, system, user, model
 
-        resp = self._ask(system, user)
-        if resp:
-            self._cache_set(key, resp)
-        return resp
+    @_guard("network_summary")
+    def analyze_network_summary(self, network_data):
+        if not self.is_enabled() or not self.network_insights:
+            return None
+
+        return self._cached_ask(*self._network_summary_request(network_data))
 
 
 
@@ -291,23 +895,29 @@ Give a 2–3 sentence Viking-style summary.
     #   VULNERABILITY ANALYSIS
     # ===================================================================
 
-    def analyze_vulnerabilities(self, vulnerabilities: List[Dict]):
-        if not self.is_enabled() or not self.vulnerability_summaries:
-            return None
-
-        key = self._cache_key("vuln_analysis", {"count": len(vulnerabilities)})
-        cached = self._cache_get(key)
-        if cached:
-            return cached
+    def _findings_budget(self, system: str, instructions: str) -> int:
+        """Tokens left for findings once the fixed prompt parts are paid out of input_budget."""
+        fixed = _fixed_tokens(system) + _fixed_tokens(instructions) + _PROMPT_HEADER_TOKENS
+        return max(0, min(self.findings_token_budget, self.input_budget - fixed))
+
+    def _vulnerability_request(self, vulnerabilities: List[Dict], model: Optional[str] = None):
+        """Return (cache_key, system, user, model) for the vulnerability analysis prompt."""
+        model = model or self.model_simple
+        candidates = sorted(_summarize_findings(_top_findings(_unique_findings(vulnerabilities), 30), 30), key=_prompt_order_key)
+        vuln_summary = _fit_to_budget(
+            candidates, self._findings_budget(_SYSTEM_VULNERABILITY, _VULNERABILITY_INSTRUCTIONS)
+        )
+        if len(vuln_summary) < len(candidates):
+            self.logger.debug(
+                f"Vulnerability prompt trimmed to {len(vuln_summary)}/{len(candidates)} findings (token budget)"
+            )
+        data_json = _compact_json(vuln_summary)
 
-        limited = vulnerabilities[:10]
-        data_json = json.dumps(limited, indent=2)
+        # Key on exactly what the model sees; findings are in canonical order,
+        # so the serialized prompt data doubles as the key material
+        key = self._cache_key("vuln_analysis", f"{len(vulnerabilities)}\x1f{data_json}", model)
 
-        system = (
-            "You are Ragnar, an elite vulnerability hunter. "
-            "Structure your analysis clearly with sections and bullet points. "
-            "Use markdown-style formatting for readability."
-        )
+        system = _SYSTEM_VULNERABILITY
 
         user = f"""
 Vulnerabilities Detected: {len(vulnerabilities)}
@@ -315,34 +925,15 @@ Vulnerabilities Detected: {len(vulnerabilities)}
 Top Findings:
 {data_json}
 
-Provide a structured analysis:
-
-First, give a brief Viking-style tactical summary (max 50 words) of the overall vulnerability situation.
-
-Then provide detailed analysis:
-
-**Critical Weaknesses:**
-- List the most severe vulnerabilities (CVE numbers if available)
-- Include affected hosts/ports
-- Note severity ratings
-
-**Immediate Actions Required:**
-- Prioritized remediation steps
-- What to patch/fix first
-- Quick wins for risk reduction
-
-**Overall Risk Assessment:**
-- Current attack surface severity (Critical/High/Medium)
-- Potential impact if exploited
-- Recommended timeline for fixes
+{_VULNERABILITY_INSTRUCTIONS}"""
+        return key, system, user, model
 
-Tone: Direct, tactical Viking strategist. Use bullet points and clear sections.
-"""
+    @_guard("vulnerability_analysis")
+    def analyze_vulnerabilities(self, vulnerabilities: List[Dict]):
+        if not self.is_enabled() or not self.vulnerability_summaries:
+            return None
 
-        resp = self._ask(system, user)
-        if resp:
-            self._cache_set(key, resp)
-        return resp
+        return self._cached_ask(*self._vulnerability_request(vulnerabilities))
 
 
 
@@ -350,26 +941,27 @@ Tone: Direct, tactical Viking strategist. Use bullet points and clear sections.
     #   ATTACK VECTOR IDENTIFICATION
     # ===================================================================
 
-    def identify_network_weaknesses(self, network_data: Dict, findings: List[Dict]):
-        if not self.is_enabled():
-            return None
-
-        key = self._cache_key("weakness", {
-            "targets": network_data.get("target_count"),
-            "findings": len(findings),
-        })
-        cached = self._cache_get(key)
-        if cached:
-            return cached
-
-        sample = json.dumps(findings[:5], indent=2)
+    def _weakness_request(self, network_data: Dict, findings: List[Dict], model: Optional[str] = None):
+        """Return (cache_key, system, user, model) for the attack vector prompt."""
+        model = model or self.model_reasoning
+        candidates = sorted(_summarize_findings(_top_findings(_unique_findings(findings), 15), 15), key=_prompt_order_key)
+        findings_summary = _fit_to_budget(
+            candidates, self._findings_budget(_SYSTEM_WEAKNESS, _WEAKNESS_INSTRUCTIONS)
+        )
+        if len(findings_summary) < len(candidates):
+            self.logger.debug(
+                f"Weakness prompt trimmed to {len(findings_summary)}/{len(candidates)} findings (token budget)"
+            )
+        sample = _compact_json(findings_summary)
 
-        system = (
-            "You are Ragnar, a penetration strategist. "
-            "Structure attack vector analysis clearly with numbered attack paths. "
-            "Use markdown formatting for readability."
+        key = self._cache_key(
+            "weakness",
+            f"{network_data.get('target_count')}\x1f{network_data.get('port_count')}\x1f{sample}",
+            model,
         )
 
+        system = _SYSTEM_WEAKNESS
+
         user = f"""
 Network Profile:
 - Devices: {network_data.get('target_count')}
@@ -378,43 +970,105 @@ Network Profile:
 Key Findings:
 {sample}
 
-Provide structured attack vector analysis:
+{_WEAKNESS_INSTRUCTIONS}"""
+        return key, system, user, model
 
-First, give a brief, witty Viking-style summary (max 50 words) describing the network's exploitability and main attack surface.
+    @_guard("weakness_analysis")
+    def identify_network_weaknesses(self, network_data: Dict, findings: List[Dict]):
+        if not self.is_enabled():
+            return None
 
-Then provide detailed attack paths:
+        return self._cached_ask(*self._weakness_request(network_data, findings))
 
-**Primary Attack Paths:**
 
-1. **[Attack Name]**
-   - Target: [specific host/service]
-   - Method: [exploitation technique]
-   - Risk Level: [Critical/High/Medium]
-   - Ease of Exploitation: [Easy/Moderate/Difficult]
 
-2. **[Attack Name]**
-   - Target: [specific host/service]
-   - Method: [exploitation technique]
-   - Risk Level: [Critical/High/Medium]
-   - Ease of Exploitation: [Easy/Moderate/Difficult]
+    # ===================================================================
+    #   SINGLE-CALL COMBINED ANALYSIS
+    # ===================================================================
 
-3. **[Attack Name]** (if applicable)
-   - Target: [specific host/service]
-   - Method: [exploitation technique]
-   - Risk Level: [Critical/High/Medium]
-   - Ease of Exploitation: [Easy/Moderate/Difficult]
+    _COMBINED_FIELDS = ("network_summary", "vulnerability_analysis", "weakness_analysis")
 
-**Defense Recommendations:**
-- Immediate hardening steps
-- Network segmentation suggestions
+    def _combined_insights(self, network_data: Dict, vulnerabilities: List[Dict],
+                           findings: List[Dict]) -> Optional[Dict[str, str]]:
+        """
+        Produce all three dashboard analyses with one request.
+        The combined answer comes from model_reasoning, so every section is
+        keyed with that model: standalone calls on the same model (the weakness
+        analysis by default) are served from cache, while sections routed to
+        model_simple never receive another model's answer under their key.
+        Returns None when the model does not return the expected JSON object.
+        """
+        model = self.model_reasoning
+        requests = dict(zip(self._COMBINED_FIELDS, (
+            self._network_summary_request(network_data, model),
+            self._vulnerability_request(vulnerabilities, model),
+            self._weakness_request(network_data, findings, model),
+        )))
+
+        results = {}
+        missing = []
+        for field, (key, _system, _user, _model) in requests.items():
+            cached = self._cache_get(key)
+            if cached:
+                results[field] = cached
+            else:
+                missing.append(field)
+        if not missing:
+            return results
+
+        # Concurrent callers asking for the same sections wait for one request
+        flight_key = self._cache_key("combined", [requests[field][0] for field in missing], model)
+        leader, event = self._claim_inflight(flight_key)
+        if not leader:
+            event.wait(self._inflight_timeout)
+            for field in missing:
+                cached = self._cache_get(requests[field][0])
+                if not cached:
+                    return None
+                results[field] = cached
+            return results
 
-Limit to 2-3 most viable attack paths. Be specific and tactical.
-"""
+        try:
+            return self._request_combined(requests, missing, results)
+        finally:
+            self._release_inflight(flight_key, event)
+
+    def _request_combined(self, requests: Dict, missing: List[str],
+                          results: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Send the combined JSON-mode request for the `missing` sections."""
+        system = _SYSTEM_COMBINED
+        sections = []
+        # The combined system prompt already carries all three personas, so the
+        # per-task system prompts are not repeated in the user message
+        for index, field in enumerate(missing, start=1):
+            task_user = requests[field][2]
+            sections.append(f"### Task {index}: {field}\n{task_user.strip()}")
+        user = (
+            "\n\n".join(sections)
+            + "\n\nRespond with a JSON object with exactly these keys: "
+            + ", ".join(missing)
+            + ". Each value is the complete answer to that task as a markdown string."
+        )
 
-        resp = self._ask(system, user)
-        if resp:
-            self._cache_set(key, resp)
-        return resp
+        # All requests carry the same (answering) model, see _combined_insights()
+        raw = self._ask(system, user, json_output=True, model=requests[missing[0]][3])
+        if not raw:
+            return None
+        try:
+            parsed = json.loads(_strip_code_fence(raw))
+        except ValueError:
+            self.logger.warning("Combined AI insights were not valid JSON; falling back to separate calls.")
+            return None
+        if not isinstance(parsed, dict) or not all(
+            isinstance(parsed.get(field), str) and parsed[field].strip() for field in missing
+        ):
+            self.logger.warning("Combined AI insights were missing sections; falling back to separate calls.")
+            return None
+
+        for field in missing:
+            results[field] = parsed[field].strip()
+            self._cache_set(requests[field][0], results[field])
+        return results
 
 
 
@@ -423,10 +1077,147 @@ Limit to 2-3 most viable attack paths. Be specific and tactical.
     # ===================================================================
 
     def analyze_batch(self, tasks: List[Dict]) -> List[Optional[str]]:
-        results = []
-        for t in tasks:
-            results.append(self._ask(t["system"], t["user"]))
-        return results
+        if len(tasks) <= 1:
+            return [self._ask(t["system"], t["user"]) for t in tasks]
+
+        # Requests are independent and network-bound: run them side by side
+        return list(self._pool().map(lambda t: self._ask(t["system"], t["user"]), tasks))
+
+
+
+    # ===================================================================
+    #   BATCH API (DEFERRED, HALF PRICE)
+    # ===================================================================
+
+    def _insight_requests(self, network_data: Dict, vulnerabilities: List[Dict],
+                          findings: List[Dict]) -> Dict[str, tuple]:
+        """(cache_key, system, user, model) for every dashboard section currently enabled."""
+        requests = {}
+        if self.network_insights:
+            requests["network_summary"] = self._network_summary_request(network_data)
+        if vulnerabilities:
+            if self.vulnerability_summaries:
+                requests["vulnerability_analysis"] = self._vulnerability_request(vulnerabilities)
+            requests["weakness_analysis"] = self._weakness_request(network_data, findings)
+        return requests
+
+    def submit_batch_insights(self, network_data: Dict, vulnerabilities: List[Dict],
+                              findings: List[Dict]) -> Optional[str]:
+        """
+        Queue the uncached dashboard analyses as one Batch API job.
+        Each request's custom_id is its cache key, so poll_batches() can file
+        the answers where the interactive methods look for them.
+        Returns the batch id, or None when nothing needed submitting.
+        """
+        if not self.is_enabled():
+            return None
+
+        lines = []
+        with self._batch_lock:
+            for key, system, user, model in self._insight_requests(network_data, vulnerabilities, findings).values():
+                if key in self._pending_keys or self._cache_get(key):
+                    continue
+                lines.append({
+                    "custom_id": key,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": self._build_payload(system, user, model=model),
+                })
+            if not lines:
+                return None
+            # Reserve the keys so a concurrent call doesn't queue them twice
+            keys = [line["custom_id"] for line in lines]
+            self._pending_keys.update(keys)
+
+        try:
+            batch_file = self.client.files.create(
+                file=("ragnar_insights.jsonl", "\n".join(_compact_json(line) for line in lines).encode()),
+                purpose="batch",
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/responses",
+                completion_window="24h",
+            )
+        except Exception as e:
+            self.logger.error(f"Batch submission failed: {e}")
+            with self._batch_lock:
+                self._pending_keys.difference_update(keys)
+            return None
+
+        with self._batch_lock:
+            self.pending_batches[batch.id] = keys
+        if self.db:
+            self.db.add_ai_pending_batch(batch.id, keys)
+
+        self.logger.info(f"Submitted AI batch {batch.id} with {len(lines)} request(s)")
+        return batch.id
+
+    def poll_batches(self) -> int:
+        """Collect finished batches into the cache; returns how many answers were stored."""
+        if not self.pending_batches or self.client is None:
+            return 0
+
+        with self._batch_lock:
+            pending = list(self.pending_batches.items())
+
+        stored = 0
+        for batch_id, keys in pending:
+            try:
+                batch = self.client.batches.retrieve(batch_id)
+            except Exception as e:
+                self.logger.warning(f"Could not check AI batch {batch_id}: {e}")
+                continue
+
+            if batch.status in ("failed", "expired", "cancelled"):
+                self.logger.warning(f"AI batch {batch_id} ended with status {batch.status}")
+            elif batch.status == "completed":
+                if batch.output_file_id:
+                    try:
+                        stored += self._store_batch_output(batch.output_file_id)
+                    except Exception as e:
+                        self.logger.error(f"Could not read AI batch {batch_id} output: {e}")
+                        continue
+            else:
+                continue
+
+            with self._batch_lock:
+                self.pending_batches.pop(batch_id, None)
+                self._pending_keys.difference_update(keys)
+            if self.db:
+                self.db.remove_ai_pending_batch(batch_id)
+        return stored
+
+    def _store_batch_output(self, file_id: str) -> int:
+        stored = 0
+        for line in self.client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            text = _response_body_text(response.get("body") or {})
+            if text:
+                self._cache_set(record["custom_id"], text)
+                stored += 1
+        return stored
+
+    def _batched_insights(self, output: Dict, network_data: Dict,
+                          vulnerabilities: List[Dict], findings: List[Dict]) -> Dict:
+        """generate_insights() for batch mode: serve from cache, queue whatever is missing."""
+        self.poll_batches()
+        self.submit_batch_insights(network_data, vulnerabilities, findings)
+
+        queued = False
+        for field, (key, _system, _user, _model) in self._insight_requests(
+            network_data, vulnerabilities, findings
+        ).items():
+            output[field] = self._cache_get(key)
+            queued = queued or output[field] is None
+        if queued:
+            output["message"] = "AI insights queued for batch processing"
+        return output
 
 
 
@@ -454,8 +1245,7 @@ Limit to 2-3 most viable attack paths. Be specific and tactical.
             "credential_count": self.shared_data.crednbr,
         }
 
-        # Summary
-        output["network_summary"] = self.analyze_network_summary(net)
+        vulns, creds = [], []
 
         # Additional analyses if intelligence system is available
         if hasattr(self.shared_data, "network_intelligence") and \
@@ -465,14 +1255,71 @@ Limit to 2-3 most viable attack paths. Be specific and tactical.
 
             vulns = list(findings.get("vulnerabilities", {}).values())
             if vulns:
-                output["vulnerability_analysis"] = self.analyze_vulnerabilities(vulns)
-
                 creds = list(findings.get("credentials", {}).values())
-                combined = vulns + creds
-                output["weakness_analysis"] = self.identify_network_weaknesses(net, combined)
 
+        # Same counters and finding content as the last refresh means the same prompts:
+        # hand back the previous result without rebuilding any of them. Findings are
+        # hashed by their prompt-relevant fields so equal counts with different
+        # findings never match, while volatile bookkeeping fields don't split the state
+        state = self._cache_key("insights_state", [
+            [net[field] for field, _label in _SUMMARY_COUNTERS],
+            _summarize_findings(vulns, len(vulns)),
+            _summarize_findings(creds, len(creds)),
+            self.model_simple, self.model_reasoning,
+            self.network_insights, self.vulnerability_summaries,
+        ])
+        last = self._last_insights
+        if last and last[0] == state and time.time() - last[1] < self.cache_ttl:
+            return dict(last[2], timestamp=output["timestamp"])
+
+        output = self._build_insights(output, net, vulns, vulns + creds)
+        if "message" not in output and any(output[field] for field in self._COMBINED_FIELDS):
+            self._last_insights = (state, time.time(), output)
         return output
 
+    def _build_insights(self, output: Dict, net: Dict, vulns: List[Dict], combined: List[Dict]) -> Dict:
+        if self.batch_mode:
+            return self._batched_insights(output, net, vulns, combined)
+
+        if not vulns:
+            output["network_summary"] = self.analyze_network_summary(net)
+            return output
+
+        # One request covering all three analyses when every section is wanted
+        if self.network_insights and self.vulnerability_summaries:
+            combined_results = self._combined_insights(net, vulns, combined)
+            if combined_results:
+                output.update(combined_results)
+                return output
+
+        # The three prompts are independent, so wait for the slowest instead of the sum
+        pool = self._pool()
+        summary = pool.submit(self.analyze_network_summary, net)
+        vuln_analysis = pool.submit(self.analyze_vulnerabilities, vulns)
+        weakness = pool.submit(self.identify_network_weaknesses, net, combined)
+
+        output["network_summary"] = summary.result()
+        output["vulnerability_analysis"] = vuln_analysis.result()
+        output["weakness_analysis"] = weakness.result()
+
+        return output
+
+
+
+    # ===================================================================
+    #   METRICS
+    # ===================================================================
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of per-analysis call counts, cache hits/misses and latency."""
+        with self._metrics_lock:
+            metrics = {name: stats.as_dict() for name, stats in self._metrics.items()}
+            metrics["prompt_cache"] = {
+                "input_tokens": self._input_tokens,
+                "cached_input_tokens": self._cached_input_tokens,
+            }
+            return metrics
+
 
 
     # ===================================================================
@@ -480,5 +1327,9 @@ Limit to 2-3 most viable attack paths. Be specific and tactical.
     # ===================================================================
 
     def clear_cache(self):
-        self.cache.clear()
+        with self._cache_lock:
+            self.cache.clear()
+        self._last_insights = None
+        if self.db is not None:
+            self.db.cleanup_ai_cache(max_age_seconds=0)
         self.logger.info("AI cache cleared")
@@ -38,10 +38,13 @@ import json
 import csv
 import logging
 import threading
+import time
 import re
+import functools
 import unicodedata
+import zlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from contextlib import contextmanager
 
 # Add parent directory to path for imports
@@ -53,6 +56,112 @@ from logger import Logger
 
 logger = Logger(name="db_manager.py", level=logging.INFO)
 
+# RETURNING clauses need SQLite 3.35+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Action/status columns that start empty for new hosts
+_HOST_ACTION_COLUMNS = (
+    'network_profile', 'scanner_status',
+    'ssh_connector', 'rdp_connector', 'ftp_connector',
+    'smb_connector', 'telnet_connector', 'sql_connector',
+    'steal_files_ssh', 'steal_files_rdp', 'steal_files_ftp',
+    'steal_files_smb', 'steal_files_telnet', 'steal_data_sql',
+    'nmap_vuln_scanner', 'notes',
+)
+
+# upsert_host() keyword arguments that may overwrite an existing host row
+_HOST_KWARG_COLUMNS = ('alive_count',) + _HOST_ACTION_COLUMNS + ('status', 'failed_ping_count')
+
+# Every column upsert_host() may overwrite on conflict
+_HOST_UPDATE_COLUMNS = ('ip', 'hostname', 'vendor', 'ports', 'services', 'vulnerabilities') + _HOST_KWARG_COLUMNS
+
+# Full hosts column list, used instead of SELECT * so reads name exactly what they fetch
+_HOST_COLUMNS = (
+    'mac', 'ip', 'hostname', 'vendor', 'ports', 'services', 'vulnerabilities',
+    'first_seen', 'last_seen', 'last_ping_success', 'failed_ping_count', 'status',
+    'alive_count',
+) + _HOST_ACTION_COLUMNS + ('created_at', 'updated_at')
+_HOST_SELECT = "SELECT " + ", ".join(_HOST_COLUMNS) + " FROM hosts"
+
+# Single-statement insert-or-update for hosts. New rows always start alive with
+# no failed pings; on conflict each column only changes when its set_* flag is true.
+_HOST_UPSERT_SQL = (
+    "INSERT INTO hosts (mac, ip, hostname, vendor, ports, services, vulnerabilities, "
+    "first_seen, last_seen, last_ping_success, failed_ping_count, status, alive_count, "
+    + ", ".join(_HOST_ACTION_COLUMNS) + ") "
+    "VALUES (:mac, :ip, :hostname, :vendor, :ports, :services, :vulnerabilities, "
+    ":now, :now, :now, 0, 'alive', :alive_count, "
+    + ", ".join(f":{col}" for col in _HOST_ACTION_COLUMNS) + ") "
+    "ON CONFLICT(mac) DO UPDATE SET "
+    + ", ".join(f"{col} = CASE WHEN :set_{col} THEN :upd_{col} ELSE {col} END" for col in _HOST_UPDATE_COLUMNS)
+    + ", last_seen = :now, updated_at = :now"
+)
+
+# Bumped whenever the on-disk encoding of a column changes (stored in PRAGMA user_version)
+_SCHEMA_VERSION = 1
+
+# Large JSON blobs (services/vulnerabilities) are stored zlib-compressed behind
+# a magic prefix; short values and rows written before schema v1 stay plain TEXT
+_PACKED_COLUMNS = ('services', 'vulnerabilities')
+_PACK_MAGIC = b'RZ1\x00'
+_PACK_MIN_LENGTH = 512
+
+
+def _pack_text(value):
+    """Compress a large text value for storage; small values are returned unchanged."""
+    if not isinstance(value, str) or len(value) < _PACK_MIN_LENGTH:
+        return value
+    return _PACK_MAGIC + zlib.compress(value.encode('utf-8'), 6)
+
+
+def _unpack_text(value):
+    """Inverse of _pack_text(); plain TEXT values pass straight through."""
+    if isinstance(value, bytes) and value.startswith(_PACK_MAGIC):
+        return zlib.decompress(value[len(_PACK_MAGIC):]).decode('utf-8')
+    return value
+
+
+def _unpack_host(host: Dict) -> Dict:
+    """Decode the packed columns of a host row dict in place."""
+    for col in _PACKED_COLUMNS:
+        if col in host:
+            host[col] = _unpack_text(host[col])
+    return host
+
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize_hostname_cached(hostname: str) -> str:
+    """Hostname normalization behind DatabaseManager.sanitize_hostname; pure, so memoized per input."""
+    # Normalize unicode and drop non-printable characters
+    normalized = unicodedata.normalize('NFKC', hostname)
+    normalized = ''.join(ch for ch in normalized if ch.isprintable())
+    normalized = normalized.replace('\r', ' ').replace('\n', ' ').replace('\t', ' ')
+
+    # Split on known separators and collapse whitespace
+    raw_tokens = re.split(r'[;,\|]+', normalized)
+    cleaned_tokens = []
+    seen = set()
+
+    for token in raw_tokens:
+        token = re.sub(r'\s+', ' ', token).strip(" _-.")
+        if not token:
+            continue
+        token_key = token.lower()
+        if token_key in seen:
+            continue
+        seen.add(token_key)
+        cleaned_tokens.append(token)
+        if len(cleaned_tokens) >= 4:
+            break  # Prevent very long alias lists
+
+    sanitized = ' / '.join(cleaned_tokens)
+    if not sanitized:
+        return ''
+
+    # Enforce max length to keep DB rows tidy
+    return sanitized[:128]
+
+
 class DatabaseManager:
     """
     Thread-safe SQLite database manager for Ragnar host/network data.
@@ -81,6 +190,38 @@ class DatabaseManager:
     - CSV migration and backward compatibility
     """
     
+    # Hot-path statements are built once so every call reuses the same SQL text
+    # and hits sqlite3's per-connection prepared statement cache
+    _SQL_UPSERT_HOST = _HOST_UPSERT_SQL
+    _SQL_UPSERT_HOST_RETURNING = _HOST_UPSERT_SQL + " RETURNING first_seen = :now"
+    _SQL_SELECT_HOST_BY_MAC = _HOST_SELECT + " WHERE mac = ?"
+    _SQL_SELECT_HOSTS_BY_IP = _HOST_SELECT + " WHERE ip = ? ORDER BY mac"
+    # ?1 is the single timestamp taken per call, shared by every time column
+    _SQL_PING_SUCCESS = (
+        "UPDATE hosts SET failed_ping_count = 0, last_ping_success = ?1, last_seen = ?1, "
+        "status = 'alive', updated_at = ?1 WHERE mac = ?2"
+    )
+    # Increments the failure count and applies the 30-ping degraded threshold in one write
+    _SQL_PING_FAILURE = (
+        "UPDATE hosts SET failed_ping_count = failed_ping_count + 1, "
+        "status = CASE WHEN failed_ping_count + 1 >= 30 THEN 'degraded' ELSE status END, "
+        "updated_at = ? WHERE mac = ?"
+    )
+    _SQL_PING_FAILURE_RETURNING = _SQL_PING_FAILURE + " RETURNING failed_ping_count"
+    _SQL_SELECT_FAILED_PINGS = "SELECT failed_ping_count FROM hosts WHERE mac = ?"
+    _SQL_UPSERT_WIFI_SCAN = (
+        "INSERT INTO wifi_scan_cache "
+        "(ssid, signal, security, last_seen, scan_count, is_known, has_system_profile) "
+        "VALUES (?, ?, ?, ?, 1, ?, ?) "
+        "ON CONFLICT(ssid) DO UPDATE SET signal = excluded.signal, security = excluded.security, "
+        "last_seen = excluded.last_seen, scan_count = scan_count + 1, "
+        "is_known = excluded.is_known, has_system_profile = excluded.has_system_profile"
+    )
+    _SQL_INSERT_SCAN_HISTORY = (
+        "INSERT INTO scan_history (mac, ip, scan_type, ports_found, vulnerabilities_found) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    
     def __init__(self, db_path: str = None, currentdir: str = None, data_root: str = None):
         """
         Initialize the database manager.
@@ -97,7 +238,15 @@ class DatabaseManager:
             db_path = os.path.join(self.datadir, 'ragnar.db')
         
         self.db_path = db_path
-        self.lock = threading.RLock()  # Reentrant lock for nested calls
+        # Guards storage reconfiguration only; SQLite (WAL + busy_timeout) serializes
+        # writers itself and lets readers run concurrently
+        self.lock = threading.RLock()
+        
+        # One persistent connection per thread, reused across calls
+        self._local = threading.local()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._connections_lock = threading.Lock()
+        self._pool_generation = 0
         
         # Legacy CSV paths for migration
         self.netkb_csv = os.path.join(self.datadir, 'netkb.csv')
@@ -122,6 +271,7 @@ class DatabaseManager:
                 os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
         if updated:
+            self.close_all()
             self._init_database()
             logger.info(f"Database storage configured: root={self.datadir}, db={self.db_path}")
     
@@ -129,30 +279,137 @@ class DatabaseManager:
     def get_connection(self):
         """
         Context manager for database connections.
-        Ensures thread-safe access and automatic cleanup.
+        Yields the calling thread's pooled connection; the outermost block
+        commits on success and rolls back on error. Nested blocks share the
+        same connection and transaction. No Python-level lock is taken:
+        readers run concurrently under WAL and writers wait on busy_timeout.
         
         Usage:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM hosts")
         """
-        conn = None
+        conn = self._get_thread_connection()
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                conn.row_factory = sqlite3.Row  # Enable dict-like access
-                conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign keys
-                yield conn
+            yield conn
+            if depth == 0:
                 conn.commit()
         except Exception as e:
-            if conn:
+            if depth == 0:
                 conn.rollback()
             logger.error(f"Database error: {e}")
             raise
         finally:
-            if conn:
-                conn.close()
+            self._local.depth = depth
+            if depth == 0 and self._local.generation != self._pool_generation:
+                # close_all() ran while this transaction was open; retire the connection now
+                self._retire_thread_connection(conn)
+
+    def _get_thread_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one on first use or after close_all()."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # A transaction in progress keeps its connection even after close_all();
+            # the switch happens on the next outermost acquire
+            if self._local.generation == self._pool_generation or getattr(self._local, 'depth', 0):
+                return conn
+            # Stale since close_all(): only the owning thread closes it
+            self._retire_thread_connection(conn)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        self._configure_connection(conn)
+        self._local.conn = conn
+        self._local.generation = self._pool_generation
+
+        current = threading.current_thread()
+        with self._connections_lock:
+            self._reap_dead_connections()
+            self._connections[current.ident] = (current, conn)
+        return conn
+
+    def _retire_thread_connection(self, conn: sqlite3.Connection):
+        """Close this thread's stale connection and drop it from the pool."""
+        with self._connections_lock:
+            entry = self._connections.get(threading.get_ident())
+            if entry is not None and entry[1] is conn:
+                del self._connections[threading.get_ident()]
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        self._close_connection(conn)
+
+    def _reap_dead_connections(self):
+        """Close connections left behind by threads that have exited (caller holds _connections_lock)."""
+        for ident, (thread, stale_conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                self._close_connection(stale_conn)
+                del self._connections[ident]
+
+    @staticmethod
+    def _close_connection(conn: sqlite3.Connection):
+        try:
+            # Let SQLite refresh any planner statistics it judges stale
+            conn.execute("PRAGMA optimize")
+            conn.close()
+        except sqlite3.Error as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+    def close_all(self):
+        """
+        Retire every pooled connection; threads reconnect on their next call.
+        Connections owned by other live threads are not closed here, since one may
+        be mid-transaction: each owner closes its stale connection on its next
+        acquire. Only the calling thread's idle connection and those of exited
+        threads are closed immediately.
+        """
+        with self._connections_lock:
+            self._pool_generation += 1
+            self._reap_dead_connections()
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None and not getattr(self._local, 'depth', 0):
+                self._connections.pop(threading.get_ident(), None)
+                self._local.conn = None
+            else:
+                conn = None
+        if conn is not None:
+            self._close_connection(conn)
     
+    def _run_maintenance(self):
+        """Refresh planner statistics and truncate the WAL after bulk deletes."""
+        if getattr(self._local, 'depth', 0):
+            return  # Still inside a caller's transaction; checkpointing would fail
+        try:
+            conn = self._get_thread_connection()
+            for table in ('hosts', 'scan_history', 'wifi_scan_cache', 'wifi_connection_history'):
+                conn.execute(f"ANALYZE {table}")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.debug(f"Database maintenance skipped: {e}")
+
+    def optimize(self):
+        """
+        Let SQLite refresh planner statistics it judges stale (PRAGMA optimize).
+        Cheap enough for the hourly cleanup task; pooled connections rarely close,
+        so running it only on close would almost never happen.
+        """
+        if getattr(self._local, 'depth', 0):
+            return
+        try:
+            self._get_thread_connection().execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            logger.debug(f"PRAGMA optimize skipped: {e}")
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply per-connection settings (these PRAGMAs are not persisted in the file)."""
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign keys
+        conn.execute("PRAGMA busy_timeout = 5000")  # Wait for writers instead of failing
+        conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, avoids fsync per commit
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -20000")  # ~20MB page cache
+        conn.execute("PRAGMA mmap_size = 268435456")
+
     def _init_database(self):
         """
         Initialize database schema and perform migrations.
@@ -161,6 +418,11 @@ class DatabaseManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # WAL lets readers proceed while a writer commits; the mode is stored
+            # in the database file so it only needs to be set once
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            
             # Create hosts table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS hosts (
@@ -202,15 +464,14 @@ class DatabaseManager:
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_hosts_ip ON hosts(ip)
             """)
+            # Composite index serves get_all_hosts(status=...) filter + ORDER BY ip
+            # without a temp B-tree sort
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_hosts_status ON hosts(status)
+                CREATE INDEX IF NOT EXISTS idx_hosts_status_ip ON hosts(status, ip)
             """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_hosts_last_seen ON hosts(last_seen)
             """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_hosts_mac ON hosts(mac)
-            """)
             
             # Create scan_history table for audit trail
             cursor.execute("""
@@ -227,7 +488,7 @@ class DatabaseManager:
             """)
             
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_scan_history_mac ON scan_history(mac)
+                CREATE INDEX IF NOT EXISTS idx_scan_history_mac_ts ON scan_history(mac, timestamp DESC)
             """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_scan_history_timestamp ON scan_history(timestamp)
@@ -274,7 +535,8 @@ class DatabaseManager:
             """)
             
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_wifi_conn_history_ssid ON wifi_connection_history(ssid)
+                CREATE INDEX IF NOT EXISTS idx_wifi_conn_history_ssid_time
+                ON wifi_connection_history(ssid, connection_time DESC)
             """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_wifi_conn_history_time ON wifi_connection_history(connection_time)
@@ -310,8 +572,40 @@ class DatabaseManager:
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_wifi_analytics_priority ON wifi_network_analytics(priority_score)
             """)
+            # Lets cleanup_old_wifi_data age out analytics with a range scan
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_wifi_analytics_last_attempt
+                ON wifi_network_analytics(last_connection_attempt)
+                WHERE last_connection_attempt IS NOT NULL
+            """)
+            
+            # Persistent cache of AI analysis responses so they survive restarts
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ai_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    response BLOB NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_ai_response_cache_created ON ai_response_cache(created_at)
+            """)
+            
+            # Batch API jobs still in flight; their results land in ai_response_cache
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ai_pending_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    submitted_at REAL NOT NULL,
+                    cache_keys TEXT NOT NULL
+                )
+            """)
+            
+            # Drop indexes superseded by the composite ones above (hosts.mac is
+            # already covered by the primary key's own index)
+            for legacy_index in ('idx_hosts_status', 'idx_hosts_mac',
+                                 'idx_scan_history_mac', 'idx_wifi_conn_history_ssid'):
+                cursor.execute(f"DROP INDEX IF EXISTS {legacy_index}")
             
-            conn.commit()
             logger.info("Database schema initialized successfully (includes WiFi tables)")
         
         # Perform CSV migration if needed
@@ -419,35 +713,7 @@ class DatabaseManager:
         """Normalize hostnames by removing control chars, collapsing duplicates, and limiting length."""
         if hostname is None:
             return ''
-
-        # Normalize unicode and drop non-printable characters
-        normalized = unicodedata.normalize('NFKC', str(hostname))
-        normalized = ''.join(ch for ch in normalized if ch.isprintable())
-        normalized = normalized.replace('\r', ' ').replace('\n', ' ').replace('\t', ' ')
-
-        # Split on known separators and collapse whitespace
-        raw_tokens = re.split(r'[;,\|]+', normalized)
-        cleaned_tokens = []
-        seen = set()
-
-        for token in raw_tokens:
-            token = re.sub(r'\s+', ' ', token).strip(" _-.")
-            if not token:
-                continue
-            token_key = token.lower()
-            if token_key in seen:
-                continue
-            seen.add(token_key)
-            cleaned_tokens.append(token)
-            if len(cleaned_tokens) >= 4:
-                break  # Prevent very long alias lists
-
-        sanitized = ' / '.join(cleaned_tokens)
-        if not sanitized:
-            return ''
-
-        # Enforce max length to keep DB rows tidy
-        return sanitized[:128]
+        return _sanitize_hostname_cached(str(hostname))
 
     def sanitize_all_hostnames(self) -> int:
         """Retroactively sanitize hostnames already stored in the database."""
@@ -510,6 +776,7 @@ class DatabaseManager:
         mac = mac.lower().strip()
         
         # DUPLICATE PREVENTION: Check for existing entry with same IP but different MAC
+        existing_host = None
         if ip:
             existing_host = self.get_host_by_ip(ip)
             if existing_host and existing_host['mac'] != mac:
@@ -560,123 +827,99 @@ class DatabaseManager:
                     logger.warning(f"⚠️ IP {ip} reassigned from MAC {existing_mac} to {mac} (both real MACs)")
                     # Continue with the new MAC, existing entry will be marked as failed ping
         
+        now = datetime.now().isoformat()
+        
+        # Optional columns only overwrite an existing row when the caller supplied them
+        if services is not None and isinstance(services, dict):
+            services = json.dumps(services)
+        if vulnerabilities is not None and isinstance(vulnerabilities, dict):
+            vulnerabilities = json.dumps(vulnerabilities)
+        provided = {
+            'ip': ip,
+            'hostname': self.sanitize_hostname(hostname) if hostname is not None else None,
+            'vendor': vendor,
+            'ports': ports,
+            'services': services,
+            'vulnerabilities': vulnerabilities,
+        }
+        for key in _HOST_KWARG_COLUMNS:
+            provided[key] = kwargs.get(key)
+        
+        # Steady-state sweeps mostly re-report what is already stored; then only
+        # last_seen needs to move, so skip rewriting every column
+        if existing_host and existing_host['mac'] == mac and all(
+            value is None or str(value) == str(existing_host.get(key) if existing_host.get(key) is not None else '')
+            for key, value in provided.items()
+        ):
+            try:
+                with self.get_connection() as conn:
+                    conn.execute("UPDATE hosts SET last_seen = ? WHERE mac = ?", (now, mac))
+                logger.debug(f"Host unchanged, refreshed last_seen: {mac} ({ip})")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to upsert host {mac}: {e}")
+                return False
+        
+        params = {
+            'mac': mac,
+            'ip': ip or '',
+            'hostname': provided['hostname'] or '',
+            'vendor': vendor or '',
+            'ports': ports or '',
+            'services': _pack_text(services) or '',
+            'vulnerabilities': _pack_text(vulnerabilities) or '',
+            'now': now,
+            'alive_count': kwargs.get('alive_count', 0),
+        }
+        for key in _HOST_ACTION_COLUMNS:
+            params[key] = kwargs.get(key, '')
+        for key in _HOST_UPDATE_COLUMNS:
+            params[f'set_{key}'] = provided[key] is not None
+            params[f'upd_{key}'] = provided[key]
+        for key in _PACKED_COLUMNS:
+            params[f'upd_{key}'] = _pack_text(params[f'upd_{key}'])
+        
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Check if host exists
-                cursor.execute("SELECT mac FROM hosts WHERE mac = ?", (mac,))
-                exists = cursor.fetchone() is not None
-                
-                # Prepare data
-                now = datetime.now().isoformat()
-                
-                if exists:
-                    # Update existing host
-                    update_fields = []
-                    update_values = []
-                    
-                    if ip is not None:
-                        update_fields.append("ip = ?")
-                        update_values.append(ip)
-                    
-                    if hostname is not None:
-                        cleaned_hostname = self.sanitize_hostname(hostname)
-                        update_fields.append("hostname = ?")
-                        update_values.append(cleaned_hostname)
-                    
-                    if vendor is not None:
-                        update_fields.append("vendor = ?")
-                        update_values.append(vendor)
-                    
-                    if ports is not None:
-                        update_fields.append("ports = ?")
-                        update_values.append(ports)
-                    
-                    if services is not None:
-                        if isinstance(services, dict):
-                            services = json.dumps(services)
-                        update_fields.append("services = ?")
-                        update_values.append(services)
-                    
-                    if vulnerabilities is not None:
-                        if isinstance(vulnerabilities, dict):
-                            vulnerabilities = json.dumps(vulnerabilities)
-                        update_fields.append("vulnerabilities = ?")
-                        update_values.append(vulnerabilities)
-                    
-                    # Handle additional kwargs
-                    for key, value in kwargs.items():
-                        if key in ['alive_count', 'network_profile', 'scanner_status',
-                                  'ssh_connector', 'rdp_connector', 'ftp_connector',
-                                  'smb_connector', 'telnet_connector', 'sql_connector',
-                                  'steal_files_ssh', 'steal_files_rdp', 'steal_files_ftp',
-                                  'steal_files_smb', 'steal_files_telnet', 'steal_data_sql',
-                                  'nmap_vuln_scanner', 'notes', 'status', 'failed_ping_count']:
-                            update_fields.append(f"{key} = ?")
-                            update_values.append(value)
-                    
-                    # Always update last_seen and updated_at
-                    update_fields.append("last_seen = ?")
-                    update_values.append(now)
-                    update_fields.append("updated_at = ?")
-                    update_values.append(now)
-                    
-                    # Add MAC to end of values for WHERE clause
-                    update_values.append(mac)
-                    
-                    if update_fields:
-                        sql = f"UPDATE hosts SET {', '.join(update_fields)} WHERE mac = ?"
-                        cursor.execute(sql, update_values)
+                if _SQLITE_HAS_RETURNING:
+                    row = conn.execute(self._SQL_UPSERT_HOST_RETURNING, params).fetchone()
+                    inserted = bool(row[0])
+                    if inserted:
+                        logger.info(f"Inserted new host: {mac} ({ip})")
+                    else:
                         logger.debug(f"Updated host: {mac} ({ip})")
                 else:
-                    # Insert new host
-                    insert_data = {
-                        'mac': mac,
-                        'ip': ip or '',
-                        'hostname': self.sanitize_hostname(hostname) if hostname is not None else '',
-                        'vendor': vendor or '',
-                        'ports': ports or '',
-                        'services': json.dumps(services) if isinstance(services, dict) else (services or ''),
-                        'vulnerabilities': json.dumps(vulnerabilities) if isinstance(vulnerabilities, dict) else (vulnerabilities or ''),
-                        'first_seen': now,
-                        'last_seen': now,
-                        'last_ping_success': now,
-                        'failed_ping_count': 0,
-                        'status': 'alive',
-                        'alive_count': kwargs.get('alive_count', 0),
-                        'network_profile': kwargs.get('network_profile', ''),
-                        'scanner_status': kwargs.get('scanner_status', ''),
-                        'ssh_connector': kwargs.get('ssh_connector', ''),
-                        'rdp_connector': kwargs.get('rdp_connector', ''),
-                        'ftp_connector': kwargs.get('ftp_connector', ''),
-                        'smb_connector': kwargs.get('smb_connector', ''),
-                        'telnet_connector': kwargs.get('telnet_connector', ''),
-                        'sql_connector': kwargs.get('sql_connector', ''),
-                        'steal_files_ssh': kwargs.get('steal_files_ssh', ''),
-                        'steal_files_rdp': kwargs.get('steal_files_rdp', ''),
-                        'steal_files_ftp': kwargs.get('steal_files_ftp', ''),
-                        'steal_files_smb': kwargs.get('steal_files_smb', ''),
-                        'steal_files_telnet': kwargs.get('steal_files_telnet', ''),
-                        'steal_data_sql': kwargs.get('steal_data_sql', ''),
-                        'nmap_vuln_scanner': kwargs.get('nmap_vuln_scanner', ''),
-                        'notes': kwargs.get('notes', ''),
-                    }
-                    
-                    columns = ', '.join(insert_data.keys())
-                    placeholders = ', '.join(['?' for _ in insert_data])
-                    sql = f"INSERT INTO hosts ({columns}) VALUES ({placeholders})"
-                    
-                    cursor.execute(sql, list(insert_data.values()))
-                    logger.info(f"Inserted new host: {mac} ({ip})")
-                
-                conn.commit()
+                    conn.execute(self._SQL_UPSERT_HOST, params)
+                    logger.debug(f"Upserted host: {mac} ({ip})")
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to upsert host {mac}: {e}")
             return False
 
+    def upsert_hosts_bulk(self, hosts: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Insert or update many hosts in a single transaction.
+        
+        Args:
+            hosts: List of dicts with a 'mac' key plus any upsert_host() arguments
+        
+        Returns:
+            Dict mapping each MAC to the upsert_host() result
+        """
+        results = {}
+        try:
+            # The outer block owns the transaction; each nested upsert reuses it,
+            # so the whole batch commits once instead of once per host
+            with self.get_connection():
+                for host in hosts:
+                    host = dict(host)
+                    mac = host.pop('mac', None)
+                    results[mac] = self.upsert_host(mac, **host)
+        except Exception as e:
+            logger.error(f"Failed to bulk upsert {len(hosts)} hosts: {e}")
+        return results
+
     def _normalize_action_column(self, action_name: Optional[str]) -> Optional[str]:
         """Map user-facing action names to database columns."""
         if not action_name:
@@ -746,7 +989,6 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM hosts WHERE mac = ?", (mac,))
-                conn.commit()
                 
                 if cursor.rowcount > 0:
                     logger.info(f"Deleted host: {mac}")
@@ -764,12 +1006,10 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM hosts WHERE mac = ?", (mac.lower().strip(),))
+                cursor.execute(self._SQL_SELECT_HOST_BY_MAC, (mac.lower().strip(),))
                 row = cursor.fetchone()
-                
-                if row:
-                    return dict(row)
-                return None
+            
+            return _unpack_host(dict(row)) if row else None
         except Exception as e:
             logger.error(f"Failed to get host by MAC {mac}: {e}")
             return None
@@ -779,24 +1019,61 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM hosts WHERE ip = ? ORDER BY mac", (ip.strip(),))
+                cursor.execute(self._SQL_SELECT_HOSTS_BY_IP, (ip.strip(),))
                 rows = cursor.fetchall()
-                
-                if not rows:
-                    return None
-                
-                # If multiple entries exist for same IP, prefer real MAC over pseudo-MAC
-                if len(rows) > 1:
-                    logger.warning(f"Found {len(rows)} entries for IP {ip} - preferring real MAC")
-                    for row in rows:
-                        if not self._is_pseudo_mac(row['mac']):
-                            return dict(row)
-                
-                return dict(rows[0])
+            
+            if not rows:
+                return None
+            
+            # If multiple entries exist for same IP, prefer real MAC over pseudo-MAC
+            if len(rows) > 1:
+                logger.warning(f"Found {len(rows)} entries for IP {ip} - preferring real MAC")
+                for row in rows:
+                    if not self._is_pseudo_mac(row['mac']):
+                        return _unpack_host(dict(row))
+            
+            return _unpack_host(dict(rows[0]))
         except Exception as e:
             logger.error(f"Failed to get host by IP {ip}: {e}")
             return None
     
+    def _iter_rows(self, sql: str, params: Tuple = ()) -> Iterator[Dict]:
+        """
+        Lazily yield query rows as dicts, fetching from SQLite in batches.
+        Read-only: runs on the thread's pooled connection outside any transaction.
+        """
+        cursor = self._get_thread_connection().execute(sql, params)
+        cursor.arraysize = 256
+        try:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def iter_all_hosts(self, status: str = None, columns: Optional[Tuple[str, ...]] = None) -> Iterator[Dict]:
+        """
+        Streaming variant of get_all_hosts() for callers that only scan the rows once.
+        Pass columns to fetch just those fields (e.g. ('mac', 'ip')) instead of the full row.
+        """
+        if columns:
+            unknown = set(columns).difference(_HOST_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown host columns: {sorted(unknown)}")
+            select = "SELECT " + ", ".join(columns) + " FROM hosts"
+        else:
+            select = _HOST_SELECT
+        if status:
+            rows = self._iter_rows(select + " WHERE status = ? ORDER BY ip", (status,))
+        else:
+            rows = self._iter_rows(select + " ORDER BY ip")
+        if columns and not set(columns).intersection(_PACKED_COLUMNS):
+            return rows
+        return map(_unpack_host, rows)
+
     def get_all_hosts(self, status: str = None) -> List[Dict]:
         """
         Get all hosts, optionally filtered by status.
@@ -808,15 +1085,7 @@ class DatabaseManager:
             List of host dictionaries
         """
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                if status:
-                    cursor.execute("SELECT * FROM hosts WHERE status = ? ORDER BY ip", (status,))
-                else:
-                    cursor.execute("SELECT * FROM hosts ORDER BY ip")
-                
-                return [dict(row) for row in cursor.fetchall()]
+            return list(self.iter_all_hosts(status))
         except Exception as e:
             logger.error(f"Failed to get all hosts: {e}")
             return []
@@ -840,44 +1109,49 @@ class DatabaseManager:
                 
                 if success:
                     # Ping succeeded - reset failure count and mark alive
-                    cursor.execute("""
-                        UPDATE hosts 
-                        SET failed_ping_count = 0,
-                            last_ping_success = ?,
-                            last_seen = ?,
-                            status = 'alive',
-                            updated_at = ?
-                        WHERE mac = ?
-                    """, (now, now, now, mac.lower().strip()))
+                    cursor.execute(self._SQL_PING_SUCCESS, (now, mac.lower().strip()))
                     logger.debug(f"Ping success: {mac} - status=alive")
                 else:
-                    # Ping failed - increment failure count
-                    cursor.execute("""
-                        UPDATE hosts 
-                        SET failed_ping_count = failed_ping_count + 1,
-                            updated_at = ?
-                        WHERE mac = ?
-                    """, (now, mac.lower().strip()))
-                    
-                    # Check if we've hit the degraded threshold (30 failed pings)
-                    cursor.execute("SELECT failed_ping_count FROM hosts WHERE mac = ?", (mac.lower().strip(),))
+                    # Ping failed - increment failure count; the same UPDATE marks the
+                    # host degraded once it reaches 30 failed pings
+                    if _SQLITE_HAS_RETURNING:
+                        cursor.execute(self._SQL_PING_FAILURE_RETURNING, (now, mac.lower().strip()))
+                    else:
+                        cursor.execute(self._SQL_PING_FAILURE, (now, mac.lower().strip()))
+                        cursor.execute(self._SQL_SELECT_FAILED_PINGS, (mac.lower().strip(),))
                     row = cursor.fetchone()
                     
                     if row and row[0] >= 30:
-                        cursor.execute("""
-                            UPDATE hosts 
-                            SET status = 'degraded'
-                            WHERE mac = ?
-                        """, (mac.lower().strip(),))
                         logger.warning(f"Host {mac} marked as degraded (30+ failed pings)")
                 
-                conn.commit()
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to update ping status for {mac}: {e}")
             return False
-    
+
+    def update_ping_success_bulk(self, macs: List[str]) -> int:
+        """
+        Record a successful ping for many hosts with a single executemany call.
+
+        Args:
+            macs: MAC addresses that answered
+
+        Returns:
+            Number of hosts written
+        """
+        now = datetime.now().isoformat()
+        rows = [(now, mac.lower().strip()) for mac in macs if mac]
+        if not rows:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(self._SQL_PING_SUCCESS, rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to update ping status batch: {e}")
+            return 0
+
     def cleanup_duplicate_hosts(self):
         """
         Remove duplicate host entries where the same IP exists with both:
@@ -997,8 +1271,6 @@ class DatabaseManager:
                             deleted_count += 1
                             logger.info(f"  → Deleted older entry: {old_mac}")
                 
-                conn.commit()
-                
                 if deleted_count > 0:
                     logger.info(f"✅ Cleanup complete! Deleted {deleted_count} duplicate entries.")
                 else:
@@ -1027,32 +1299,81 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Get hosts to be removed for logging
-                cursor.execute("""
-                    SELECT mac, ip, hostname, last_seen 
-                    FROM hosts 
-                    WHERE last_seen < ?
-                """, (cutoff_iso,))
-                
-                to_remove = cursor.fetchall()
-                
-                # Delete old hosts
-                cursor.execute("DELETE FROM hosts WHERE last_seen < ?", (cutoff_iso,))
-                
-                removed_count = cursor.rowcount
-                conn.commit()
+                if _SQLITE_HAS_RETURNING:
+                    # Delete and collect the removed rows for logging in one indexed pass
+                    cursor.execute("""
+                        DELETE FROM hosts WHERE last_seen < ?
+                        RETURNING mac, ip, last_seen
+                    """, (cutoff_iso,))
+                    to_remove = cursor.fetchall()
+                    removed_count = len(to_remove)
+                else:
+                    # Get hosts to be removed for logging
+                    cursor.execute("""
+                        SELECT mac, ip, hostname, last_seen 
+                        FROM hosts 
+                        WHERE last_seen < ?
+                    """, (cutoff_iso,))
+                    
+                    to_remove = cursor.fetchall()
+                    
+                    # Delete old hosts
+                    cursor.execute("DELETE FROM hosts WHERE last_seen < ?", (cutoff_iso,))
+                    
+                    removed_count = cursor.rowcount
                 
                 if removed_count > 0:
                     logger.info(f"Cleaned up {removed_count} hosts not seen in {hours} hours")
                     for row in to_remove:
                         logger.debug(f"  Removed: {row['mac']} ({row['ip']}) last seen {row['last_seen']}")
-                
-                return removed_count
+            
+            if removed_count > 0:
+                self._run_maintenance()
+            return removed_count
                 
         except Exception as e:
             logger.error(f"Failed to cleanup old hosts: {e}")
             return 0
     
+    def _delete_in_batches(self, table: str, where: str, params: Tuple = (),
+                           batch_size: int = 1000) -> int:
+        """
+        Delete matching rows a batch at a time, committing between batches so
+        the write lock is only held briefly.
+        
+        Returns:
+            int: Total number of rows deleted
+        """
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT ?)"
+        total = 0
+        while True:
+            with self.get_connection() as conn:
+                deleted = conn.execute(sql, (*params, batch_size)).rowcount
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def cleanup_old_scan_history(self, days: int = 30) -> int:
+        """
+        Remove scan history entries older than the given number of days.
+        
+        Args:
+            days: Remove entries older than this many days (default: 30)
+        
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            removed = self._delete_in_batches(
+                'scan_history', "timestamp < datetime('now', ?)", (f'-{int(days)} days',))
+            if removed > 0:
+                logger.info(f"Cleaned up {removed} scan history entries older than {days} days")
+                self._run_maintenance()
+            return removed
+        except Exception as e:
+            logger.error(f"Failed to cleanup scan history: {e}")
+            return 0
+    
     def add_scan_history(self, mac: str, ip: str, scan_type: str, 
                         ports_found: str = None, vulnerabilities_found: int = 0):
         """
@@ -1068,16 +1389,39 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO scan_history (mac, ip, scan_type, ports_found, vulnerabilities_found)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (mac.lower().strip(), ip, scan_type, ports_found or '', vulnerabilities_found))
-                conn.commit()
+                cursor.execute(self._SQL_INSERT_SCAN_HISTORY,
+                               (mac.lower().strip(), ip, scan_type, ports_found or '', vulnerabilities_found))
                 return True
         except Exception as e:
             logger.error(f"Failed to add scan history: {e}")
             return False
     
+    def add_scan_history_bulk(self, entries: List[Tuple]) -> int:
+        """
+        Add many scan history entries with a single executemany call.
+        
+        Args:
+            entries: Iterable of (mac, ip, scan_type[, ports_found[, vulnerabilities_found]]) tuples
+        
+        Returns:
+            Number of entries written
+        """
+        rows = []
+        for entry in entries:
+            mac, ip, scan_type = entry[:3]
+            ports_found = entry[3] if len(entry) > 3 else None
+            vulnerabilities_found = entry[4] if len(entry) > 4 else 0
+            rows.append((mac.lower().strip(), ip, scan_type, ports_found or '', vulnerabilities_found))
+        if not rows:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(self._SQL_INSERT_SCAN_HISTORY, rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to add scan history batch: {e}")
+            return 0
+    
     def get_scan_history(self, mac: str = None, limit: int = 100) -> List[Dict]:
         """
         Get scan history, optionally filtered by MAC address.
@@ -1107,7 +1451,9 @@ class DatabaseManager:
                         LIMIT ?
                     """, (limit,))
                 
-                return [dict(row) for row in cursor.fetchall()]
+                rows = cursor.fetchall()
+            
+            return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Failed to get scan history: {e}")
             return []
@@ -1123,31 +1469,27 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                stats = {}
-                
-                # Total hosts
-                cursor.execute("SELECT COUNT(*) FROM hosts")
-                stats['total_hosts'] = cursor.fetchone()[0]
-                
-                # Alive hosts
-                cursor.execute("SELECT COUNT(*) FROM hosts WHERE status = 'alive'")
-                stats['alive_hosts'] = cursor.fetchone()[0]
-                
-                # Degraded hosts
-                cursor.execute("SELECT COUNT(*) FROM hosts WHERE status = 'degraded'")
-                stats['degraded_hosts'] = cursor.fetchone()[0]
-                
-                # Hosts with open ports
-                cursor.execute("SELECT COUNT(*) FROM hosts WHERE ports != '' AND ports IS NOT NULL")
-                stats['hosts_with_ports'] = cursor.fetchone()[0]
-                
-                # Hosts with vulnerabilities
-                cursor.execute("SELECT COUNT(*) FROM hosts WHERE vulnerabilities != '' AND vulnerabilities IS NOT NULL")
-                stats['hosts_with_vulns'] = cursor.fetchone()[0]
+                # Walk the hosts table once with conditional aggregates; the scan
+                # count rides along as a scalar subquery in the same fetch
+                cursor.execute("""
+                    SELECT COUNT(*),
+                           COALESCE(SUM(status = 'alive'), 0),
+                           COALESCE(SUM(status = 'degraded'), 0),
+                           COALESCE(SUM(ports != '' AND ports IS NOT NULL), 0),
+                           COALESCE(SUM(vulnerabilities != '' AND vulnerabilities IS NOT NULL), 0),
+                           (SELECT COUNT(*) FROM scan_history)
+                    FROM hosts
+                """)
+                row = cursor.fetchone()
                 
-                # Total scans
-                cursor.execute("SELECT COUNT(*) FROM scan_history")
-                stats['total_scans'] = cursor.fetchone()[0]
+                stats = {
+                    'total_hosts': row[0],
+                    'alive_hosts': row[1],
+                    'degraded_hosts': row[2],
+                    'hosts_with_ports': row[3],
+                    'hosts_with_vulns': row[4],
+                    'total_scans': row[5],
+                }
                 
                 return stats
         except Exception as e:
@@ -1245,54 +1587,23 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 timestamp = datetime.now()
                 
+                rows = []
                 for network in networks:
                     ssid = network.get('ssid', '').strip()
                     if not ssid or network.get('instruction'):  # Skip instruction entries
                         continue
-                    
-                    # Check if network exists
-                    cursor.execute("""
-                        SELECT scan_count FROM wifi_scan_cache WHERE ssid = ?
-                    """, (ssid,))
-                    row = cursor.fetchone()
-                    
-                    if row:
-                        # Update existing entry
-                        scan_count = row[0] + 1
-                        cursor.execute("""
-                            UPDATE wifi_scan_cache
-                            SET signal = ?,
-                                security = ?,
-                                last_seen = ?,
-                                scan_count = ?,
-                                is_known = ?,
-                                has_system_profile = ?
-                            WHERE ssid = ?
-                        """, (
-                            network.get('signal', 0),
-                            network.get('security', ''),
-                            timestamp,
-                            scan_count,
-                            1 if network.get('known', False) else 0,
-                            1 if network.get('has_system_profile', False) else 0,
-                            ssid
-                        ))
-                    else:
-                        # Insert new entry
-                        cursor.execute("""
-                            INSERT INTO wifi_scan_cache 
-                            (ssid, signal, security, last_seen, scan_count, is_known, has_system_profile)
-                            VALUES (?, ?, ?, ?, 1, ?, ?)
-                        """, (
-                            ssid,
-                            network.get('signal', 0),
-                            network.get('security', ''),
-                            timestamp,
-                            1 if network.get('known', False) else 0,
-                            1 if network.get('has_system_profile', False) else 0
-                        ))
+                    rows.append((
+                        ssid,
+                        network.get('signal', 0),
+                        network.get('security', ''),
+                        timestamp,
+                        1 if network.get('known', False) else 0,
+                        1 if network.get('has_system_profile', False) else 0
+                    ))
+                
+                # Insert new networks or bump scan_count on existing ones without a lookup per SSID
+                cursor.executemany(self._SQL_UPSERT_WIFI_SCAN, rows)
                 
-                conn.commit()
                 logger.debug(f"Cached {len([n for n in networks if not n.get('instruction')])} WiFi networks")
                 
         except Exception as e:
@@ -1319,20 +1630,19 @@ class DatabaseManager:
                     WHERE last_seen >= ?
                     ORDER BY signal DESC
                 """, (cutoff_time,))
-                
-                networks = []
-                for row in cursor.fetchall():
-                    networks.append({
-                        'ssid': row[0],
-                        'signal': row[1],
-                        'security': row[2],
-                        'last_seen': row[3],
-                        'known': bool(row[4]),
-                        'has_system_profile': bool(row[5])
-                    })
-                
-                logger.debug(f"Retrieved {len(networks)} cached WiFi networks (max age: {max_age_seconds}s)")
-                return networks
+                rows = cursor.fetchall()
+            
+            networks = [{
+                'ssid': row[0],
+                'signal': row[1],
+                'security': row[2],
+                'last_seen': row[3],
+                'known': bool(row[4]),
+                'has_system_profile': bool(row[5])
+            } for row in rows]
+            
+            logger.debug(f"Retrieved {len(networks)} cached WiFi networks (max age: {max_age_seconds}s)")
+            return networks
                 
         except Exception as e:
             logger.error(f"Error retrieving cached WiFi networks: {e}")
@@ -1370,7 +1680,6 @@ class DatabaseManager:
                 ))
                 
                 conn_id = cursor.lastrowid
-                conn.commit()
                 
                 # Update analytics
                 self._update_wifi_analytics(ssid, success, failure_reason, signal_strength)
@@ -1430,7 +1739,6 @@ class DatabaseManager:
                         WHERE id = ?
                     """, (now, duration, conn_id))
                     
-                    conn.commit()
                     logger.debug(f"Updated disconnection for {ssid} (duration: {duration}s)")
                 
         except Exception as e:
@@ -1537,8 +1845,6 @@ class DatabaseManager:
                         now
                     ))
                 
-                conn.commit()
-                
         except Exception as e:
             logger.error(f"Error updating WiFi analytics: {e}")
     
@@ -1568,14 +1874,11 @@ class DatabaseManager:
                     """)
                 
                 columns = [desc[0] for desc in cursor.description]
-                results = []
-                
-                for row in cursor.fetchall():
-                    result = dict(zip(columns, row))
-                    results.append(result)
-                
-                logger.debug(f"Retrieved analytics for {len(results)} WiFi networks")
-                return results
+                rows = cursor.fetchall()
+            
+            results = [dict(zip(columns, row)) for row in rows]
+            logger.debug(f"Retrieved analytics for {len(results)} WiFi networks")
+            return results
                 
         except Exception as e:
             logger.error(f"Error retrieving WiFi analytics: {e}")
@@ -1614,14 +1917,11 @@ class DatabaseManager:
                     """, (limit,))
                 
                 columns = [desc[0] for desc in cursor.description]
-                results = []
-                
-                for row in cursor.fetchall():
-                    result = dict(zip(columns, row))
-                    results.append(result)
-                
-                logger.info(f"Recommended {len(results)} WiFi networks")
-                return results
+                rows = cursor.fetchall()
+            
+            results = [dict(zip(columns, row)) for row in rows]
+            logger.info(f"Recommended {len(results)} WiFi networks")
+            return results
                 
         except Exception as e:
             logger.error(f"Error getting recommended networks: {e}")
@@ -1657,13 +1957,9 @@ class DatabaseManager:
                     """, (limit,))
                 
                 columns = [desc[0] for desc in cursor.description]
-                results = []
-                
-                for row in cursor.fetchall():
-                    result = dict(zip(columns, row))
-                    results.append(result)
-                
-                return results
+                rows = cursor.fetchall()
+            
+            return [dict(zip(columns, row)) for row in rows]
                 
         except Exception as e:
             logger.error(f"Error retrieving WiFi connection history: {e}")
@@ -1677,9 +1973,15 @@ class DatabaseManager:
             days: Remove data older than this many days
         """
         try:
+            cutoff_date = datetime.now() - timedelta(days=days)
+            
+            # Connection history is the table that grows without bound; delete it in
+            # short batches so scanner writes are never stalled behind one long lock
+            history_deleted = self._delete_in_batches(
+                'wifi_connection_history', 'connection_time < ?', (cutoff_date,))
+            
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cutoff_date = datetime.now() - timedelta(days=days)
                 
                 # Remove old scan cache
                 cursor.execute("""
@@ -1688,13 +1990,6 @@ class DatabaseManager:
                 """, (cutoff_date,))
                 scan_deleted = cursor.rowcount
                 
-                # Remove old connection history
-                cursor.execute("""
-                    DELETE FROM wifi_connection_history
-                    WHERE connection_time < ?
-                """, (cutoff_date,))
-                history_deleted = cursor.rowcount
-                
                 # Remove analytics for networks not seen in the time period
                 cursor.execute("""
                     DELETE FROM wifi_network_analytics
@@ -1702,13 +1997,101 @@ class DatabaseManager:
                 """, (cutoff_date,))
                 analytics_deleted = cursor.rowcount
                 
-                conn.commit()
                 logger.info(f"Cleaned up old WiFi data: {scan_deleted} scans, "
                           f"{history_deleted} history, {analytics_deleted} analytics")
+            
+            if history_deleted + scan_deleted + analytics_deleted > 0:
+                self._run_maintenance()
                 
         except Exception as e:
             logger.error(f"Error cleaning up WiFi data: {e}")
 
+    # ============================================================================
+    # AI RESPONSE CACHE METHODS
+    # ============================================================================
+    
+    def get_ai_cache(self, cache_key: str, max_age_seconds: int) -> Optional[str]:
+        """
+        Return a cached AI response younger than max_age_seconds, or None.
+        
+        Args:
+            cache_key: Key derived from the prompt and its context
+            max_age_seconds: Entries older than this are treated as missing
+        """
+        try:
+            cutoff = time.time() - max_age_seconds
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT response FROM ai_response_cache WHERE cache_key = ? AND created_at >= ?",
+                    (cache_key, cutoff),
+                ).fetchone()
+            return _unpack_text(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"Error reading AI response cache: {e}")
+            return None
+    
+    def set_ai_cache(self, cache_key: str, response: str) -> bool:
+        """Store (or refresh) a cached AI response; large responses are stored compressed."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_response_cache (cache_key, created_at, response) VALUES (?, ?, ?)",
+                    (cache_key, time.time(), _pack_text(response)),
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error writing AI response cache: {e}")
+            return False
+    
+    def cleanup_ai_cache(self, max_age_seconds: int = 3600) -> int:
+        """
+        Remove cached AI responses older than max_age_seconds.
+        
+        Returns:
+            Number of entries removed
+        """
+        try:
+            return self._delete_in_batches('ai_response_cache', 'created_at < ?',
+                                           (time.time() - max_age_seconds,))
+        except Exception as e:
+            logger.error(f"Error cleaning up AI response cache: {e}")
+            return 0
+    
+    def get_ai_pending_batches(self) -> Dict[str, List[str]]:
+        """Return every in-flight Batch API job as {batch_id: [cache_key, ...]}."""
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT batch_id, cache_keys FROM ai_pending_batches"
+                ).fetchall()
+            return {row[0]: json.loads(row[1]) for row in rows}
+        except Exception as e:
+            logger.error(f"Error reading pending AI batches: {e}")
+            return {}
+    
+    def add_ai_pending_batch(self, batch_id: str, cache_keys: List[str]) -> bool:
+        """Record a submitted Batch API job and the cache keys it will fill."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_pending_batches (batch_id, submitted_at, cache_keys) VALUES (?, ?, ?)",
+                    (batch_id, time.time(), json.dumps(list(cache_keys))),
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error recording pending AI batch: {e}")
+            return False
+    
+    def remove_ai_pending_batch(self, batch_id: str) -> bool:
+        """Forget a Batch API job once it has finished (or failed)."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("DELETE FROM ai_pending_batches WHERE batch_id = ?", (batch_id,))
+            return True
+        except Exception as e:
+            logger.error(f"Error removing pending AI batch: {e}")
+            return False
+
 
 # Singleton instance
 _db_instance = None
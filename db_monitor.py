@@ -3,10 +3,13 @@
 # Usage: python3 db_monitor.py [command]
 # Commands: stats, hosts, degraded, scans, watch
 
+import io
 import os
+import shutil
 import sys
 import time
 import argparse
+import contextlib
 from datetime import datetime, timedelta
 
 # Add parent directory to path
@@ -16,23 +19,29 @@ if parent_dir not in sys.path:
 
 from db_manager import get_db
 
-def print_separator(char='=', length=80):
-    print(char * length)
+def _separator(char='=', length=80):
+    return char * length
+
+def _write_lines(lines):
+    """Emit a whole table with one write instead of a print() per row"""
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 def show_stats(db):
     """Show database statistics"""
     stats = db.get_stats()
     
-    print_separator()
-    print("📊 RAGNAR DATABASE STATISTICS")
-    print_separator()
-    print(f"Total Hosts:          {stats.get('total_hosts', 0)}")
-    print(f"  ✅ Alive:           {stats.get('alive_hosts', 0)}")
-    print(f"  ⚠️  Degraded:        {stats.get('degraded_hosts', 0)}")
-    print(f"Hosts with Ports:     {stats.get('hosts_with_ports', 0)}")
-    print(f"Hosts with Vulns:     {stats.get('hosts_with_vulns', 0)}")
-    print(f"Total Scans:          {stats.get('total_scans', 0)}")
-    print_separator()
+    _write_lines([
+        _separator(),
+        "📊 RAGNAR DATABASE STATISTICS",
+        _separator(),
+        f"Total Hosts:          {stats.get('total_hosts', 0)}",
+        f"  ✅ Alive:           {stats.get('alive_hosts', 0)}",
+        f"  ⚠️  Degraded:        {stats.get('degraded_hosts', 0)}",
+        f"Hosts with Ports:     {stats.get('hosts_with_ports', 0)}",
+        f"Hosts with Vulns:     {stats.get('hosts_with_vulns', 0)}",
+        f"Total Scans:          {stats.get('total_scans', 0)}",
+        _separator(),
+    ])
 
 def show_hosts(db, status=None):
     """Show all hosts or filtered by status"""
@@ -42,11 +51,13 @@ def show_hosts(db, status=None):
         print(f"No hosts found{' with status: ' + status if status else ''}")
         return
     
-    print_separator()
-    print(f"🖥️  HOSTS{' - ' + status.upper() if status else ''} ({len(hosts)} total)")
-    print_separator()
-    print(f"{'IP':<15} {'MAC':<17} {'Hostname':<25} {'Status':<10} {'Fails':<6} {'Ports':<30}")
-    print_separator('-')
+    out = [
+        _separator(),
+        f"🖥️  HOSTS{' - ' + status.upper() if status else ''} ({len(hosts)} total)",
+        _separator(),
+        f"{'IP':<15} {'MAC':<17} {'Hostname':<25} {'Status':<10} {'Fails':<6} {'Ports':<30}",
+        _separator('-'),
+    ]
     
     for host in hosts:
         ip = host.get('ip', '')[:15]
@@ -59,9 +70,10 @@ def show_hosts(db, status=None):
         # Color coding
         status_icon = '✅' if status == 'alive' else '🔴'
         
-        print(f"{ip:<15} {mac:<17} {hostname:<25} {status_icon}{status:<9} {fails:<6} {ports:<30}")
+        out.append(f"{ip:<15} {mac:<17} {hostname:<25} {status_icon}{status:<9} {fails:<6} {ports:<30}")
     
-    print_separator()
+    out.append(_separator())
+    _write_lines(out)
 
 def show_degraded(db):
     """Show degraded hosts (30+ failed pings)"""
@@ -71,11 +83,13 @@ def show_degraded(db):
         print("✅ No degraded hosts - all systems nominal!")
         return
     
-    print_separator()
-    print(f"🔴 DEGRADED HOSTS ({len(hosts)} total)")
-    print_separator()
-    print(f"{'IP':<15} {'MAC':<17} {'Hostname':<25} {'Failed Pings':<12} {'Last Seen':<20}")
-    print_separator('-')
+    out = [
+        _separator(),
+        f"🔴 DEGRADED HOSTS ({len(hosts)} total)",
+        _separator(),
+        f"{'IP':<15} {'MAC':<17} {'Hostname':<25} {'Failed Pings':<12} {'Last Seen':<20}",
+        _separator('-'),
+    ]
     
     for host in hosts:
         ip = host.get('ip', '')[:15]
@@ -84,9 +98,10 @@ def show_degraded(db):
         fails = str(host.get('failed_ping_count', 0))
         last_seen = host.get('last_seen', '')[:19]
         
-        print(f"{ip:<15} {mac:<17} {hostname:<25} {fails:<12} {last_seen:<20}")
+        out.append(f"{ip:<15} {mac:<17} {hostname:<25} {fails:<12} {last_seen:<20}")
     
-    print_separator()
+    out.append(_separator())
+    _write_lines(out)
 
 def show_scans(db, limit=20):
     """Show recent scan history"""
@@ -96,11 +111,13 @@ def show_scans(db, limit=20):
         print("No scan history found")
         return
     
-    print_separator()
-    print(f"📡 RECENT SCANS (last {limit})")
-    print_separator()
-    print(f"{'Time':<20} {'Type':<15} {'IP':<15} {'MAC':<17} {'Ports/Vulns':<30}")
-    print_separator('-')
+    out = [
+        _separator(),
+        f"📡 RECENT SCANS (last {limit})",
+        _separator(),
+        f"{'Time':<20} {'Type':<15} {'IP':<15} {'MAC':<17} {'Ports/Vulns':<30}",
+        _separator('-'),
+    ]
     
     for scan in scans:
         timestamp = scan.get('timestamp', '')[:19]
@@ -113,50 +130,102 @@ def show_scans(db, limit=20):
         else:
             detail = scan.get('ports_found', '')[:30]
         
-        print(f"{timestamp:<20} {scan_type:<15} {ip:<15} {mac:<17} {detail:<30}")
+        out.append(f"{timestamp:<20} {scan_type:<15} {ip:<15} {mac:<17} {detail:<30}")
     
-    print_separator()
+    out.append(_separator())
+    _write_lines(out)
 
 def show_vulnerabilities(db):
     """Show hosts with vulnerabilities"""
-    hosts = db.get_all_hosts()
-    vuln_hosts = [h for h in hosts if h.get('vulnerabilities') and h.get('vulnerabilities').strip()]
+    vuln_hosts = [h for h in db.iter_all_hosts(columns=('ip', 'hostname', 'vulnerabilities')) if h.get('vulnerabilities') and h.get('vulnerabilities').strip()]
     
     if not vuln_hosts:
         print("✅ No vulnerabilities found!")
         return
     
-    print_separator()
-    print(f"🔓 HOSTS WITH VULNERABILITIES ({len(vuln_hosts)} total)")
-    print_separator()
-    print(f"{'IP':<15} {'Hostname':<25} {'Vulnerabilities':<50}")
-    print_separator('-')
+    out = [
+        _separator(),
+        f"🔓 HOSTS WITH VULNERABILITIES ({len(vuln_hosts)} total)",
+        _separator(),
+        f"{'IP':<15} {'Hostname':<25} {'Vulnerabilities':<50}",
+        _separator('-'),
+    ]
     
     for host in vuln_hosts:
         ip = host.get('ip', '')[:15]
         hostname = host.get('hostname', '')[:25]
         vulns = host.get('vulnerabilities', '')[:50]
         
-        print(f"{ip:<15} {hostname:<25} {vulns:<50}")
+        out.append(f"{ip:<15} {hostname:<25} {vulns:<50}")
     
-    print_separator()
+    out.append(_separator())
+    _write_lines(out)
+
+def _capture_lines(render, *args):
+    """Run a show_* renderer and return its output as a list of lines"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        render(*args)
+    return buffer.getvalue().splitlines()
+
+def _fit_to_terminal(lines, height):
+    """Clip a frame to the terminal height, keeping the last row free for the cursor"""
+    rows = max(height - 1, 1)
+    if len(lines) <= rows:
+        return lines
+    hidden = len(lines) - rows + 1
+    return lines[:rows - 1] + [f"... {hidden} more line(s), enlarge the terminal to see them"]
+
+def _redraw_changed_lines(lines, previous_lines):
+    """Rewrite only the terminal rows whose content changed since the last frame"""
+    out = []
+    for row, line in enumerate(lines, start=1):
+        if row > len(previous_lines) or previous_lines[row - 1] != line:
+            out.append(f"\x1b[{row};1H\x1b[2K{line}")
+    # Blank rows left over from a longer previous frame
+    for row in range(len(lines) + 1, len(previous_lines) + 1):
+        out.append(f"\x1b[{row};1H\x1b[2K")
+    out.append(f"\x1b[{len(lines) + 1};1H")
+    sys.stdout.write(''.join(out))
+    sys.stdout.flush()
 
 def watch_db(db, interval=5):
     """Watch database changes in real-time"""
-    print(f"👁️  Watching database (refresh every {interval}s, Ctrl+C to stop)...")
-    print()
+    banner = f"👁️  Watching database (refresh every {interval}s, Ctrl+C to stop)..."
     
+    previous_lines = []
+    previous_size = None
+    if os.name != 'nt':
+        # No autowrap: a line wider than the terminal is cut instead of spilling onto the next row
+        sys.stdout.write('\x1b[?7l')
     try:
         while True:
-            os.system('clear' if os.name != 'nt' else 'cls')
-            print(f"🕐 Last update: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print()
-            show_stats(db)
-            print()
-            show_degraded(db)
+            lines = [banner, "", f"🕐 Last update: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+            lines += _capture_lines(show_stats, db)
+            lines.append("")
+            lines += _capture_lines(show_degraded, db)
+            
+            if os.name == 'nt':
+                os.system('cls')
+                print('\n'.join(lines))
+            else:
+                # Rows are addressed absolutely, so the frame must fit on screen; a resize
+                # invalidates what is already drawn and forces a full redraw
+                size = shutil.get_terminal_size()
+                lines = _fit_to_terminal(lines, size.lines)
+                if size != previous_size:
+                    sys.stdout.write('\x1b[H\x1b[2J')
+                    previous_lines = []
+                    previous_size = size
+                _redraw_changed_lines(lines, previous_lines)
+            previous_lines = lines
             time.sleep(interval)
     except KeyboardInterrupt:
         print("\n\n✋ Stopped watching")
+    finally:
+        if os.name != 'nt':
+            sys.stdout.write('\x1b[?7h')
+            sys.stdout.flush()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -134,10 +134,9 @@ class Display:
                     # Get alive hosts from SQLite database instead of CSV
                     try:
                         db_stats = self.shared_data.db.get_stats()
-                        alive_hosts = self.shared_data.db.get_all_hosts()
                         alive_macs = {
-                            h['mac'] for h in alive_hosts 
-                            if h.get('status') == 'alive' and h.get('mac') != 'STANDALONE'
+                            h['mac'] for h in self.shared_data.db.iter_all_hosts(status='alive', columns=('mac',))
+                            if h.get('mac') != 'STANDALONE'
                         }
                         logger.debug(f"Loaded {len(alive_macs)} alive MACs from database")
                     except Exception as e:
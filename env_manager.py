@@ -5,23 +5,36 @@ Manages OpenAI API token storage in .env file
 """
 
 import os
+import re
 import logging
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# The script is in the project root; resolved once instead of per EnvManager()/load_env()
+_DEFAULT_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Matches the token assignment anywhere in .env in a single scan
+_TOKEN_LINE_RE = re.compile(r'^[ \t]*RAGNAR_OPENAI_API_KEY=(.*?)[ \t]*$', re.MULTILINE)
+
+# OpenAI keys only use these characters; anything else (quotes, $, newlines) would corrupt .env
+_SAFE_TOKEN_RE = re.compile(r'sk-[A-Za-z0-9_\-]{16,}')
+
+
+@lru_cache(maxsize=32)
+def _is_valid_token(token):
+    # fullmatch: a bare $ anchor would still accept a trailing newline
+    return _SAFE_TOKEN_RE.fullmatch(token) is not None
+
 class EnvManager:
     def __init__(self, project_root=None):
         """
         Initializes the EnvManager.
         It determines the project root and the path to the .env file.
         """
-        if project_root:
-            self.project_root = project_root
-        else:
-            # The script is in the project root, so just use its directory
-            self.project_root = os.path.dirname(os.path.abspath(__file__))
+        self.project_root = project_root or _DEFAULT_PROJECT_ROOT
 
         self.env_file_path = os.path.join(self.project_root, '.env')
         logger.info(f"Project root identified as: {self.project_root}")
@@ -39,35 +52,65 @@ class EnvManager:
             return token
 
         # 2. If not in env, check .env file
-        if not os.path.exists(self.env_file_path):
+        token = self._read_file_token()
+        if token is not None:
+            logger.info("Token found in .env file.")
+        return token
+
+    def _read_file_token(self):
+        """
+        Returns the RAGNAR_OPENAI_API_KEY value stored in the .env file, or None.
+        """
+        # Open directly rather than stat() first
+        try:
+            with open(self.env_file_path, 'r') as f:
+                match = _TOKEN_LINE_RE.search(f.read())
+        except FileNotFoundError:
             logger.warning(f".env file not found at {self.env_file_path}")
             return None
-        
-        with open(self.env_file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('RAGNAR_OPENAI_API_KEY='):
-                    token = line.split('=', 1)[1]
-                    logger.info("Token found in .env file.")
-                    return token
+
+        if match:
+            return match.group(1)
         
         logger.info("RAGNAR_OPENAI_API_KEY not found in .env file.")
         return None
 
+    def validate_token(self, token):
+        """
+        Checks the token format in-process before it is written anywhere.
+        """
+        return isinstance(token, str) and _is_valid_token(token)
+
     def save_token(self, token):
         """
         Saves the token to the .env file. This will create or overwrite the file.
         """
+        if not self.validate_token(token):
+            logger.error("Refusing to save API token with an invalid format.")
+            return {"success": False, "message": "✗ Invalid API token format. OpenAI keys start with 'sk-'."}
+
+        tmp_path = f"{self.env_file_path}.tmp"
         try:
-            with open(self.env_file_path, 'w') as f:
+            # Re-submitting the same token: already live in the process and on disk, skip the rewrite
+            if os.environ.get('RAGNAR_OPENAI_API_KEY') == token and self._read_file_token() == token:
+                logger.info(f"Token unchanged, {self.env_file_path} left as is")
+                return {"success": True, "message": "✓ API token saved. Please restart the Ragnar service to apply the changes."}
+
+            # Write beside the target and rename over it so a crash never leaves a truncated .env
+            with open(tmp_path, 'w') as f:
                 f.write(f'RAGNAR_OPENAI_API_KEY={token}\n')
-            
+            os.replace(tmp_path, self.env_file_path)
+
             # Also set it in the current running process's environment for immediate use
             os.environ['RAGNAR_OPENAI_API_KEY'] = token
             
             logger.info(f"Token saved to {self.env_file_path}")
             return {"success": True, "message": "✓ API token saved. Please restart the Ragnar service to apply the changes."}
         except Exception as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
             logger.error(f"Failed to save token to .env file: {e}", exc_info=True)
             return {"success": False, "message": f"✗ Failed to save token to .env file: {e}"}
 
@@ -85,16 +128,7 @@ def load_env(project_root=None):
     Loads environment variables from the .env file into the process environment.
     This should be called at the very start of the application.
     """
-    # Determine project root relative to this file's location
-    if not project_root:
-        # The script is in the project root
-        project_root = os.path.dirname(os.path.abspath(__file__))
-
-    env_path = os.path.join(project_root, '.env')
-
-    if not os.path.exists(env_path):
-        logger.warning(f"Cannot load environment: .env file not found at {env_path}")
-        return
+    env_path = os.path.join(project_root or _DEFAULT_PROJECT_ROOT, '.env')
 
     try:
         with open(env_path, 'r') as f:
@@ -107,5 +141,7 @@ def load_env(project_root=None):
                         os.environ[key] = value
                         logger.info(f"Loaded '{key}' from .env file into process environment.")
         logger.info(".env file processed.")
+    except FileNotFoundError:
+        logger.warning(f"Cannot load environment: .env file not found at {env_path}")
     except Exception as e:
         logger.error(f"Failed to load .env file at {env_path}: {e}", exc_info=True)
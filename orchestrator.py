@@ -302,29 +302,26 @@ class Orchestrator:
             logger.warning("No actions loaded - check actions.json configuration")
             return False
 
+        # Extract and normalize each alive host's ports once, instead of once per action
+        alive_targets = []
+        for row in alive_hosts:
+            ports = self._extract_ports(row)
+            alive_targets.append((row, row["IPs"], ports, {str(p).strip().split('/')[0] for p in ports}))
+
         # Process all parent actions (those without dependencies) across ALL hosts
         for action in self.actions:
             if action.b_parent_action is None:
                 action_key = action.action_name
                 required_port = getattr(action, 'port', None)
+                required_port_str = self._required_port_key(required_port)
                 
                 # Pre-filter hosts by port requirement (FAST - no semaphore needed)
-                for row in current_data:
-                    if row["Alive"] != '1':
-                        continue
-                    
-                    ip = row["IPs"]
-                    ports = self._extract_ports(row)
-                    
+                for row, ip, ports, port_set in alive_targets:
                     # OPTIMIZATION: Check port requirement BEFORE acquiring semaphore
                     # This prevents serializing hundreds of "port not found" checks
-                    if required_port not in (None, '', 0, '0'):
-                        required_port_str = str(required_port).strip().split('/')[0]
-                        ports_normalized = [str(p).strip().split('/')[0] for p in ports]
-                        
-                        if required_port_str not in ports_normalized:
-                            # Skip silently - port not available (no semaphore needed)
-                            continue
+                    if required_port_str is not None and required_port_str not in port_set:
+                        # Skip silently - port not available (no semaphore needed)
+                        continue
                     
                     # MEMORY CHECK: Prevent OOM kills
                     if not resource_monitor.can_start_operation(f"action_{action_key}", min_memory_mb=30):
@@ -353,23 +350,14 @@ class Orchestrator:
             if child_action.b_parent_action:
                 action_key = child_action.action_name
                 required_port = getattr(child_action, 'port', None)
+                required_port_str = self._required_port_key(required_port)
                 
-                for row in current_data:
-                    if row["Alive"] != '1':
-                        continue
-                    
-                    ip = row["IPs"]
-                    ports = self._extract_ports(row)
-                    
+                for row, ip, ports, port_set in alive_targets:
                     # OPTIMIZATION: Check port requirement BEFORE acquiring semaphore
                     # This prevents serializing hundreds of "port not found" checks
-                    if required_port not in (None, '', 0, '0'):
-                        required_port_str = str(required_port).strip().split('/')[0]
-                        ports_normalized = [str(p).strip().split('/')[0] for p in ports]
-                        
-                        if required_port_str not in ports_normalized:
-                            # Skip silently - port not available (no semaphore/logging overhead)
-                            continue
+                    if required_port_str is not None and required_port_str not in port_set:
+                        # Skip silently - port not available (no semaphore/logging overhead)
+                        continue
                     
                     # MEMORY CHECK: Prevent OOM kills
                     if not resource_monitor.can_start_operation(f"child_action_{action_key}", min_memory_mb=30):
@@ -479,6 +467,13 @@ class Orchestrator:
             # self.shared_data.write_data(current_data)
             return False
 
+    @staticmethod
+    def _required_port_key(required_port):
+        """Normalized port an action needs, or None when it runs regardless of ports."""
+        if required_port in (None, '', 0, '0'):
+            return None
+        return str(required_port).strip().split('/')[0]
+
     @staticmethod
     def _extract_ports(row):
         """Return a sanitized list of ports extracted from a data row."""
@@ -39,7 +39,10 @@ DISPLAY_PROFILES = {
 }
 
 
-logger = Logger(name="shared.py", level=logging.DEBUG) # Create a logger object 
+logger = Logger(name="shared.py", level=logging.DEBUG) # Create a logger object
+
+# Serializes AI service construction (see SharedData.initialize_ai_service)
+_ai_service_init_lock = threading.Lock() 
 
 class SharedData:
     """Shared data between the different modules."""
@@ -111,28 +114,35 @@ class SharedData:
     
     def initialize_ai_service(self):
         """Initialize the AI service"""
-        try:
-            from ai_service import AIService
-            logger.info("Attempting to initialize AI service...")
-            self.ai_service = AIService(self)
-            if self.ai_service.is_enabled():
-                logger.info("AI service initialized successfully with GPT-5 Nano")
-            else:
-                init_error = getattr(self.ai_service, 'initialization_error', None)
-                if init_error:
-                    logger.warning(f"AI service initialized but not enabled: {init_error}")
+        # Web routes call this when they find no service; only one of several
+        # concurrent first callers should build it
+        if self.ai_service is not None:
+            return
+        with _ai_service_init_lock:
+            if self.ai_service is not None:
+                return
+            try:
+                from ai_service import AIService
+                logger.info("Attempting to initialize AI service...")
+                self.ai_service = AIService(self)
+                if self.ai_service.is_enabled():
+                    logger.info("AI service initialized successfully with GPT-5 Nano")
                 else:
-                    logger.info("AI service initialized but not enabled (check configuration)")
-        except ImportError as e:
-            logger.error(f"Failed to import AI service module: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            self.ai_service = None
-        except Exception as e:
-            logger.error(f"Failed to initialize AI service: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            self.ai_service = None
+                    init_error = getattr(self.ai_service, 'initialization_error', None)
+                    if init_error:
+                        logger.warning(f"AI service initialized but not enabled: {init_error}")
+                    else:
+                        logger.info("AI service initialized but not enabled (check configuration)")
+            except ImportError as e:
+                logger.error(f"Failed to import AI service module: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
+                self.ai_service = None
+            except Exception as e:
+                logger.error(f"Failed to initialize AI service: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
+                self.ai_service = None
 
     def _calculate_scanned_networks_count(self) -> int:
         """Calculate the number of scanned networks (excluding defaults)."""
@@ -417,9 +427,11 @@ class SharedData:
             "ai_enabled": False,
             "openai_api_token": "",
             "ai_model": "gpt-5-nano",
+            "ai_model_simple": "gpt-5-nano",
             "ai_analysis_enabled": True,
             "ai_vulnerability_summaries": True,
             "ai_network_insights": True,
+            "ai_batch_mode": False,
             "ai_max_tokens": 500,
             "ai_temperature": 0.7,
 
@@ -1226,6 +1238,10 @@ class SharedData:
                     removed = self.db.cleanup_old_hosts(hours=24)
                     if removed > 0:
                         logger.info(f"🧹 Cleanup: Removed {removed} hosts not seen in 24 hours")
+                    self.db.cleanup_old_scan_history(days=30)
+                    ai_cache_ttl = getattr(self.ai_service, 'persistent_cache_ttl', 604800) if self.ai_service else 604800
+                    self.db.cleanup_ai_cache(max_age_seconds=ai_cache_ttl)
+                    self.db.optimize()
                 except Exception as e:
                     logger.error(f"Error in cleanup task: {e}")
         
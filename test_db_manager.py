@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for DatabaseManager host upserts, run against a temporary database
+"""
+
+from datetime import datetime
+
+import pytest
+
+import db_manager
+from db_manager import DatabaseManager
+
+FIRST_SCAN = datetime(2024, 1, 1, 12, 0, 0)
+SECOND_SCAN = datetime(2024, 1, 1, 12, 5, 0)
+
+
+class _Clock(datetime):
+    """datetime whose now() is set by the test."""
+    current = FIRST_SCAN
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    _Clock.current = FIRST_SCAN
+    monkeypatch.setattr(db_manager, "datetime", _Clock)
+    return _Clock
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(db_path=str(tmp_path / "ragnar.db"), data_root=str(tmp_path))
+    yield manager
+    manager.close_all()
+
+
+def _strip_timestamps(host):
+    return {key: value for key, value in host.items() if key not in ("created_at", "updated_at")}
+
+
+def test_first_insert_sets_first_seen(db, clock):
+    assert db.upsert_host("AA:BB:CC:DD:EE:01", ip="192.168.1.10", hostname="printer", ports="80,443")
+
+    host = db.get_host_by_mac("aa:bb:cc:dd:ee:01")
+    assert host["first_seen"] == FIRST_SCAN.isoformat()
+    assert host["last_seen"] == FIRST_SCAN.isoformat()
+    assert host["ip"] == "192.168.1.10"
+    assert host["hostname"] == "printer"
+    assert host["ports"] == "80,443"
+
+
+def test_update_leaves_omitted_columns_untouched(db, clock):
+    db.upsert_host("aa:bb:cc:dd:ee:02", ip="192.168.1.20", hostname="nas", vendor="Synology",
+                   ports="22,445", services={"22": "ssh"}, notes="backup box")
+
+    clock.current = SECOND_SCAN
+    assert db.upsert_host("aa:bb:cc:dd:ee:02", ip="192.168.1.21", ports="22,445,5000")
+
+    host = db.get_host_by_mac("aa:bb:cc:dd:ee:02")
+    assert host["ip"] == "192.168.1.21"
+    assert host["ports"] == "22,445,5000"
+    assert host["hostname"] == "nas"
+    assert host["vendor"] == "Synology"
+    assert host["services"] == '{"22": "ssh"}'
+    assert host["notes"] == "backup box"
+    assert host["first_seen"] == FIRST_SCAN.isoformat()
+    assert host["last_seen"] == SECOND_SCAN.isoformat()
+
+
+def test_unchanged_host_only_refreshes_last_seen(db, clock):
+    db.upsert_host("aa:bb:cc:dd:ee:03", ip="192.168.1.30", hostname="tv", ports="8008")
+    before = db.get_host_by_mac("aa:bb:cc:dd:ee:03")
+
+    clock.current = SECOND_SCAN
+    assert db.upsert_host("aa:bb:cc:dd:ee:03", ip="192.168.1.30", hostname="tv")
+
+    after = db.get_host_by_mac("aa:bb:cc:dd:ee:03")
+    assert after["last_seen"] == SECOND_SCAN.isoformat()
+    assert after["updated_at"] == before["updated_at"]
+    assert {**after, "last_seen": None} == {**before, "last_seen": None}
+
+
+def test_bulk_upsert_matches_single_row(tmp_path, clock):
+    hosts = [
+        {"mac": "aa:bb:cc:dd:ee:10", "ip": "10.0.0.10", "hostname": "alpha", "ports": "22"},
+        {"mac": "aa:bb:cc:dd:ee:11", "ip": "10.0.0.11", "vendor": "Acme", "alive_count": 3},
+        {"mac": "aa:bb:cc:dd:ee:10", "ip": "10.0.0.10", "ports": "22,80"},
+    ]
+    single = DatabaseManager(db_path=str(tmp_path / "single.db"), data_root=str(tmp_path))
+    bulk = DatabaseManager(db_path=str(tmp_path / "bulk.db"), data_root=str(tmp_path))
+    try:
+        for host in hosts:
+            host = dict(host)
+            assert single.upsert_host(host.pop("mac"), **host)
+
+        results = bulk.upsert_hosts_bulk(hosts)
+        assert results == {"aa:bb:cc:dd:ee:10": True, "aa:bb:cc:dd:ee:11": True}
+
+        expected = [_strip_timestamps(host) for host in single.get_all_hosts()]
+        assert [_strip_timestamps(host) for host in bulk.get_all_hosts()] == expected
+        assert bulk.get_host_by_mac("aa:bb:cc:dd:ee:10")["ports"] == "22,80"
+    finally:
+        single.close_all()
+        bulk.close_all()
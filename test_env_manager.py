@@ -1,42 +1,105 @@
 #!/usr/bin/env python3
 """
-Test script for environment variable manager
+Tests for the environment variable manager
 """
 
+import os
+
+import pytest
+
+import env_manager
 from env_manager import EnvManager
 
-def test_env_manager():
-    print("Testing EnvManager...")
-    env_manager = EnvManager()
-    
-    # Test 1: Check current token
-    print("\n1. Checking current token...")
-    token = env_manager.get_token()
-    if token:
-        print(f"   ✓ Token found: {token[:8]}...{token[-4:]}")
-    else:
-        print("   ℹ No token currently set")
-    
-    # Test 2: Validate token format
-    print("\n2. Testing token validation...")
-    test_tokens = [
-        ("sk-proj-abcd1234efgh5678", True),
-        ("sk-abcdefghijklmnop", True),
-        ("invalid-token", False),
-        ("", False),
-        ("pk-test123", False)
-    ]
-    
-    for test_token, expected in test_tokens:
-        result = env_manager.validate_token(test_token)
-        status = "✓" if result == expected else "✗"
-        print(f"   {status} '{test_token[:20]}...' -> {result} (expected {expected})")
-    
-    # Test 3: Check .bashrc path
-    print(f"\n3. .bashrc location: {env_manager.bashrc_path}")
-    print(f"   Exists: {env_manager.bashrc_path.exists()}")
-    
-    print("\n✓ All tests completed!")
-
-if __name__ == "__main__":
-    test_env_manager()
+VALID_TOKEN = "sk-proj-abcd1234efgh5678"
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.delenv("RAGNAR_OPENAI_API_KEY", raising=False)
+    return EnvManager(project_root=str(tmp_path))
+
+
+@pytest.mark.parametrize("token, expected", [
+    (VALID_TOKEN, True),
+    ("sk-abcdefghijklmnop", True),
+    ("sk-short", False),
+    (VALID_TOKEN + "\n", False),
+    ("sk-abcd1234efgh5678\nOTHER=1", False),
+    ("invalid-token", False),
+    ("", False),
+    ("pk-test123", False),
+    (None, False),
+])
+def test_validate_token(manager, token, expected):
+    assert manager.validate_token(token) is expected
+
+
+def test_save_token_writes_env_file(manager):
+    result = manager.save_token(VALID_TOKEN)
+
+    assert result["success"]
+    with open(manager.env_file_path) as f:
+        assert f.read() == f"RAGNAR_OPENAI_API_KEY={VALID_TOKEN}\n"
+    assert os.environ["RAGNAR_OPENAI_API_KEY"] == VALID_TOKEN
+    assert manager.get_token() == VALID_TOKEN
+    assert not os.path.exists(f"{manager.env_file_path}.tmp")
+
+
+@pytest.mark.parametrize("token", ["sk-short", VALID_TOKEN + "\n"])
+def test_save_token_rejects_invalid(manager, token):
+    result = manager.save_token(token)
+
+    assert not result["success"]
+    assert not os.path.exists(manager.env_file_path)
+    assert "RAGNAR_OPENAI_API_KEY" not in os.environ
+
+
+def test_save_token_replaces_file_atomically(manager, monkeypatch):
+    with open(manager.env_file_path, "w") as f:
+        f.write("RAGNAR_OPENAI_API_KEY=sk-old0000000000000000\n")
+
+    replaced = []
+    real_replace = os.replace
+
+    def tracking_replace(src, dst):
+        replaced.append((src, dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(env_manager.os, "replace", tracking_replace)
+
+    assert manager.save_token(VALID_TOKEN)["success"]
+    assert replaced == [(f"{manager.env_file_path}.tmp", manager.env_file_path)]
+    assert manager._read_file_token() == VALID_TOKEN
+
+
+def test_save_token_failed_replace_keeps_old_file(manager, monkeypatch):
+    with open(manager.env_file_path, "w") as f:
+        f.write("RAGNAR_OPENAI_API_KEY=sk-old0000000000000000\n")
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(env_manager.os, "replace", failing_replace)
+
+    result = manager.save_token(VALID_TOKEN)
+    assert not result["success"]
+    assert manager._read_file_token() == "sk-old0000000000000000"
+    assert not os.path.exists(f"{manager.env_file_path}.tmp")
+
+
+def test_save_token_unchanged_skips_rewrite(manager, monkeypatch):
+    assert manager.save_token(VALID_TOKEN)["success"]
+
+    def unexpected_replace(src, dst):
+        raise AssertionError("unchanged token should not rewrite .env")
+
+    monkeypatch.setattr(env_manager.os, "replace", unexpected_replace)
+
+    assert manager.save_token(VALID_TOKEN)["success"]
+
+
+def test_get_token_status(manager):
+    assert manager.get_token_status() == {"token_set": False}
+
+    manager.save_token(VALID_TOKEN)
+    assert manager.get_token_status() == {"token_set": True, "preview": "sk-pr...5678"}
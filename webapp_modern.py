@@ -55,6 +55,7 @@ from lynis_parser import parse_lynis_dat
 from actions.lynis_pentest_ssh import LynisPentestSSH
 from actions.connector_utils import CredentialChecker
 from db_manager import get_db
+from env_manager import EnvManager
 
 # Initialize logger
 logger = Logger(name="webapp_modern.py", level=logging.DEBUG)
@@ -516,6 +517,22 @@ def _is_pwn_install_stale(status: Optional[dict], max_age_seconds: int = PWN_INS
     return age.total_seconds() > max_age_seconds
 
 
+def _tail_file_lines(path: str, count: int, block_size: int = 4096) -> list[str]:
+    """Equivalent of readlines()[-count:] that only reads blocks from the end of the file."""
+    with open(path, 'rb') as handle:
+        handle.seek(0, os.SEEK_END)
+        position = handle.tell()
+        data = b''
+        # One extra newline guarantees the first of the last `count` lines is complete
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            handle.seek(position)
+            data = handle.read(step) + data
+    text = data.decode('utf-8', errors='ignore')
+    return io.StringIO(text, newline=None).readlines()[-count:]
+
+
 def _read_pwn_log_chunk(cursor: Optional[int] = None, tail_bytes: int = 4096, max_bytes: int = 8192):
     """Return a slice of the installer log starting at cursor or tail bytes from end."""
     status = _build_pwnagotchi_status(persist=False)
@@ -2157,7 +2174,7 @@ def update_config():
                         ai_reload_error = getattr(ai_service, 'initialization_error', None)
                 else:
                     ai_service.enabled = False
-                    ai_service.client = None
+                    ai_service.close()
                     ai_service.initialization_error = None
                     ai_reload_success = True
         
@@ -3199,29 +3216,23 @@ def get_logs():
         # 1. PRIORITY: Get orchestrator.py logs (main scanning activity)
         orchestrator_log = os.path.join(shared_data.logsdir, 'orchestrator.py.log')
         if os.path.exists(orchestrator_log):
-            with open(orchestrator_log, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                # Get last 100 lines of orchestrator logs
-                orch_logs = [line.strip() for line in lines[-20:] if line.strip()]
-                all_logs.extend(orch_logs)
+            # Get last 20 lines of orchestrator logs
+            orch_logs = [line.strip() for line in _tail_file_lines(orchestrator_log, 20) if line.strip()]
+            all_logs.extend(orch_logs)
         
         # 2. Get scanning.py logs (network scanning details)
         scanning_log = os.path.join(shared_data.logsdir, 'scanning.py.log')
         if os.path.exists(scanning_log):
-            with open(scanning_log, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                # Get last 50 lines of scanning logs
-                scan_logs = [line.strip() for line in lines[-10:] if line.strip()]
-                all_logs.extend(scan_logs)
+            # Get last 10 lines of scanning logs
+            scan_logs = [line.strip() for line in _tail_file_lines(scanning_log, 10) if line.strip()]
+            all_logs.extend(scan_logs)
         
         # 3. Get nmap_vuln_scanner.py logs (vulnerability scanning)
         vuln_scanner_log = os.path.join(shared_data.logsdir, 'nmap_vuln_scanner.py.log')
         if os.path.exists(vuln_scanner_log):
-            with open(vuln_scanner_log, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                # Get last 50 lines of vuln scanner logs
-                vuln_logs = [line.strip() for line in lines[-10:] if line.strip()]
-                all_logs.extend(vuln_logs)
+            # Get last 10 lines of vuln scanner logs
+            vuln_logs = [line.strip() for line in _tail_file_lines(vuln_scanner_log, 10) if line.strip()]
+            all_logs.extend(vuln_logs)
         
         # 2. Get Ragnar main activity logs from data/logs directory
         logs_dir = shared_data.logsdir
@@ -3245,10 +3256,8 @@ def get_logs():
                         mod_time = os.path.getmtime(log_path)
                         # Only show logs from last 24 hours
                         if time.time() - mod_time < 86400:  # 24 hours
-                            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                lines = f.readlines()
-                                recent_lines = [line.strip() for line in lines[-10:] if line.strip()]
-                                all_logs.extend(recent_lines)
+                            recent_lines = [line.strip() for line in _tail_file_lines(log_path, 10) if line.strip()]
+                            all_logs.extend(recent_lines)
                     except Exception as e:
                         # Skip files that can't be read
                         continue
@@ -3623,7 +3632,7 @@ def attack_logs():
                 'failed_count': failed_count
             }, sort_keys=True).encode('utf-8')
 
-            etag_value = f'W/"attack-{hashlib.md5(etag_source).hexdigest()}"'
+            etag_value = f'W/"attack-{hashlib.blake2b(etag_source, digest_size=16).hexdigest()}"'
 
             last_modified_dt = filtered_latest or latest_log_time_all
             if last_modified_dt and last_modified_dt.tzinfo is None:
@@ -3852,9 +3861,7 @@ def get_verbose_debug_logs():
         try:
             log_file = shared_data.webconsolelog if hasattr(shared_data, 'webconsolelog') else None
             if log_file and os.path.exists(log_file):
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    recent_lines = f.readlines()[-20:]  # Last 20 log lines
-                    debug_info['recent_logs'] = recent_lines
+                debug_info['recent_logs'] = _tail_file_lines(log_file, 20)  # Last 20 log lines
         except Exception as e:
             debug_info['errors_and_warnings'].append(f"Error reading recent logs: {str(e)}")
         
@@ -4142,7 +4149,6 @@ def get_ai_service_diagnostic():
         
         # Try to get token from env
         try:
-            from env_manager import EnvManager
             env_mgr = EnvManager()
             token = env_mgr.get_token()
             diagnostic['env_token_found'] = bool(token)
@@ -8399,12 +8405,10 @@ def get_recent_logs():
         # 1. Get web console logs (filtered for security content)
         log_file = shared_data.webconsolelog
         if os.path.exists(log_file):
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                web_logs = [line.strip() for line in lines[-10:] if line.strip()]
-                # Filter for security-relevant logs only
-                filtered_web_logs = [log for log in web_logs if should_include_realtime_log(log)]
-                logs.extend([f"[WEB] {log}" for log in filtered_web_logs[-10:]])  # Last 10 relevant logs
+            web_logs = [line.strip() for line in _tail_file_lines(log_file, 10) if line.strip()]
+            # Filter for security-relevant logs only
+            filtered_web_logs = [log for log in web_logs if should_include_realtime_log(log)]
+            logs.extend([f"[WEB] {log}" for log in filtered_web_logs[-10:]])  # Last 10 relevant logs
         
         # 2. Add recent activity summary (only if security-related)
         current_time = datetime.now().strftime("%H:%M:%S")
@@ -10732,7 +10736,6 @@ def clear_ai_cache():
 def get_ai_token():
     """Get OpenAI API token status (without revealing the actual token)"""
     try:
-        from env_manager import EnvManager
         env_manager = EnvManager()
         
         token = env_manager.get_token()
@@ -10751,7 +10754,6 @@ def get_ai_token():
 def save_ai_token():
     """Save OpenAI API token to .env file"""
     try:
-        from env_manager import EnvManager
         env_manager = EnvManager()
         
         data = request.get_json()
@@ -10802,7 +10804,6 @@ def save_ai_token():
         
     except Exception as e:
         logger.error(f"Error saving AI token: {e}")
-        import traceback
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
@@ -10811,8 +10812,6 @@ def save_ai_token():
 def remove_ai_token():
     """Remove OpenAI API token from .env file"""
     try:
-        from env_manager import EnvManager
-        import os
         env_manager = EnvManager()
         
         # Remove the .env file